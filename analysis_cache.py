@@ -0,0 +1,108 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from storage import get_connection, transaction
+
+def normalize(text):
+    """Lowercase and collapse whitespace so cosmetic edits map to the same key"""
+    return re.sub(r'\s+', ' ', (text or '').lower()).strip()
+
+def cache_key(job, prompt_version):
+    """Content hash of the fields the prompt depends on, tagged with the prompt version"""
+    parts = [str(prompt_version), normalize(job.get('title')),
+             normalize((job.get('description') or '')[:500]), normalize(job.get('rate'))]
+    return hashlib.sha256('\x1f'.join(parts).encode()).hexdigest()
+
+# Persistent LLM analysis cache
+class AnalysisCache:
+    """SQLite-backed cache of Gemini analyses with a small in-memory LRU in front.
+
+    Entries expire after `ttl_seconds`; the table is trimmed to the `max_entries`
+    most recently used rows every `sweep_every` writes.
+    """
+
+    def __init__(self, prompt_version, ttl_seconds=7 * 86400, max_entries=5000,
+                 memory_entries=256, sweep_every=50):
+        self.prompt_version = prompt_version
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.sweep_every = sweep_every
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {'hits': 0, 'memory_hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+
+    def _remember(self, key, created_at, analysis):
+        with self.lock:
+            self.memory[key] = (created_at, analysis)
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_entries:
+                self.memory.popitem(last=False)
+
+    def _count(self, name, amount=1):
+        with self.lock:
+            self.counters[name] += amount
+
+    def get(self, job):
+        """Return the cached analysis for a job, or None"""
+        key = cache_key(job, self.prompt_version)
+        now = time.time()
+
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry and now - entry[0] < self.ttl_seconds:
+                self.memory.move_to_end(key)
+                self.counters['hits'] += 1
+                self.counters['memory_hits'] += 1
+                return dict(entry[1])
+
+        row = get_connection().execute(
+            "SELECT analysis, created_at FROM analysis_cache WHERE key = ? AND created_at > ?",
+            (key, now - self.ttl_seconds)).fetchone()
+        if not row:
+            self._count('misses')
+            return None
+
+        with transaction() as conn:
+            conn.execute("UPDATE analysis_cache SET last_used = ? WHERE key = ?", (now, key))
+
+        analysis = json.loads(row[0])
+        self._remember(key, row[1], analysis)
+        self._count('hits')
+        return dict(analysis)
+
+    def put(self, job, analysis):
+        """Store an analysis for a job"""
+        key = cache_key(job, self.prompt_version)
+        now = time.time()
+
+        with transaction() as conn:
+            conn.execute('''INSERT OR REPLACE INTO analysis_cache (key, analysis, created_at, last_used)
+                            VALUES (?, ?, ?, ?)''', (key, json.dumps(analysis), now, now))
+        self._count('writes')
+        if self.counters['writes'] % self.sweep_every == 0:
+            self._sweep(now)
+
+        self._remember(key, now, dict(analysis))
+
+    def _sweep(self, now):
+        """Drop expired rows, then the least recently used rows beyond max_entries"""
+        with transaction() as conn:
+            expired = conn.execute("DELETE FROM analysis_cache WHERE created_at <= ?",
+                                   (now - self.ttl_seconds,)).rowcount
+            overflow = conn.execute('''DELETE FROM analysis_cache WHERE key IN
+                                       (SELECT key FROM analysis_cache ORDER BY last_used DESC
+                                        LIMIT -1 OFFSET ?)''', (self.max_entries,)).rowcount
+        self._count('evictions', expired + overflow)
+
+    def stats(self):
+        """Counters plus the hit ratio"""
+        with self.lock:
+            counters = dict(self.counters)
+        lookups = counters['hits'] + counters['misses']
+        counters['hit_ratio'] = counters['hits'] / lookups if lookups else 0.0
+        return counters
@@ -1,13 +1,30 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
 import os
+import atexit
 import json
-import sqlite3
-from datetime import datetime, timedelta
+import re
+import base64
+from datetime import date, datetime, timedelta
+from functools import wraps
 import threading
 import time
-import requests
-import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor
 from apscheduler.schedulers.background import BackgroundScheduler
+from http_client import post, save_validators
+from storage import init_db, get_connection, transaction, data_version, bump_data_version
+import metrics
+import storage
+import rollups
+import near_dup
+import bloom
+import outbox
+import retention
+from search import search_jobs
+from analysis_cache import AnalysisCache
+from response_cache import ResponseCache
+from scoring import PreFilter, score_job, score_jobs
+from quota import QuotaGovernor, QuotaExhausted, is_rate_limit_error
+from leader import LeaderLease
 
 app = Flask(__name__)
 
@@ -16,67 +33,73 @@ CONFIG = {
     'gemini_api_key': os.environ.get('GEMINI_API_KEY', ''),
     'telegram_bot_token': os.environ.get('TELEGRAM_BOT_TOKEN', ''),
     'telegram_chat_id': os.environ.get('TELEGRAM_CHAT_ID', '548324624'),
+    'telegram_api_url': os.environ.get('TELEGRAM_API_URL', 'https://api.telegram.org'),
     'min_hourly_rate': 15,  # Based on real data analysis
     'priority_rate': 25,    # Instant alerts for $25+
-    'check_interval_minutes': 30,  # Check every 30 minutes
+    'scrape_concurrency': 4,  # Max pages fetched at once across all sources
+    'host_requests_per_second': 0.5,  # Politeness limit per site
+    'analysis_cache_ttl_days': 14,  # Reuse a stored AI analysis for this long
+    'analysis_cache_max_entries': 5000,
+    'analysis_batch_size': 10,  # Jobs packed into one Gemini request
+    'analysis_concurrency': 3,  # Gemini requests in flight at once
+    'gemini_requests_per_minute': 15,  # Free tier limits
+    'gemini_requests_per_day': 1500,
+    'prefilter_enabled': True,  # Settle obvious skips/matches locally before Gemini
+    'prefilter_blacklist': ['customer support', 'email support', 'chat support', 'data entry',
+                            'telemarketing', 'cold calling', 'appointment setter', 'lead generation'],
+    'prefilter_whitelist': ['discord', 'community manager', 'community moderator', 'web3'],
+    'near_duplicate_threshold': 0.8,  # Estimated Jaccard above which postings are one cluster
+    'leader_lease_seconds': 90,  # If the scanning worker dies, another takes over after this long
+    'telegram_messages_per_second': 1,  # Telegram's per-chat limit
+    'telegram_digest_threshold': 3,  # Alerts due at once from which they are sent as one digest
+    'telegram_max_attempts': 8,  # Deliveries tried before an alert is given up
+    'telegram_retry_seconds': 30,  # First retry delay, doubled after every failure
+    'stream_poll_seconds': 15,  # Live feed: check for jobs saved by another worker / send a keepalive
+    'stream_max_seconds': 600,  # Live feed connections are closed after this; browsers reconnect
+    'stream_max_connections': 4,  # Each open live feed holds a gunicorn thread (8 in total); extras get a 503
+    'response_cache_entries': 256,  # Rendered dashboard/API responses kept in memory
+    'response_cache_bytes': 4 * 1024 * 1024,
+    'retention_skip_days': 14,  # Skip-priority and scam-scored jobs are deleted after this
+    'retention_archive_days': 90,  # Older jobs move to archive/jobs-YYYY-MM.jsonl.gz
+    'retention_outbox_days': 30,  # Delivered or abandoned alerts are purged after this
+    'retention_interval_hours': 6,
 }
 
-# Configure Gemini AI
-if CONFIG['gemini_api_key']:
-    genai.configure(api_key=CONFIG['gemini_api_key'])
-    gemini_model = genai.GenerativeModel('gemini-1.5-flash')
+# Configure Gemini AI lazily: the SDK takes most of a second to import, so it is
+# loaded by the first scan that needs it instead of delaying web startup
+gemini_model = None
+gemini_lock = threading.Lock()
 
-# Database setup
-def init_db():
-    conn = sqlite3.connect('jobs.db')
-    c = conn.cursor()
-    c.execute('''CREATE TABLE IF NOT EXISTS jobs
-                 (id TEXT PRIMARY KEY,
-                  title TEXT,
-                  platform TEXT,
-                  url TEXT,
-                  description TEXT,
-                  rate TEXT,
-                  client_verified INTEGER,
-                  client_spent TEXT,
-                  proposals INTEGER,
-                  posted_date TEXT,
-                  score INTEGER,
-                  priority TEXT,
-                  red_flags TEXT,
-                  why_match TEXT,
-                  notified INTEGER DEFAULT 0,
-                  created_at TEXT)''')
-    
-    c.execute('''CREATE TABLE IF NOT EXISTS stats
-                 (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                  date TEXT,
-                  total_found INTEGER,
-                  high_priority INTEGER,
-                  medium_priority INTEGER,
-                  scams_filtered INTEGER,
-                  connects_saved INTEGER)''')
-    conn.commit()
-    conn.close()
+def get_gemini_model():
+    """Return the Gemini model, importing and configuring the SDK on first use"""
+    global gemini_model
+    with gemini_lock:
+        if gemini_model is None:
+            import google.generativeai as genai
+            genai.configure(api_key=CONFIG['gemini_api_key'])
+            gemini_model = genai.GenerativeModel('gemini-1.5-flash')
+        return gemini_model
 
+# Database setup
 init_db()
 
-# Job Analysis with Gemini AI
-def analyze_job(job):
-    """Use Gemini to analyze if job is good match and detect scams"""
-    
-    prompt = f"""Analyze this job posting for a Discord/Web3 Community Manager with 6 years experience.
+# Bump whenever the prompt changes so cached analyses from the old prompt are ignored
+PROMPT_VERSION = 1
 
-JOB:
-Title: {job['title']}
-Description: {job['description'][:500]}
-Rate: {job['rate']}
-Platform: {job['platform']}
-Client: {"Payment Verified" if job.get('client_verified') else "Not Verified"}
-Client Spent: {job.get('client_spent', 'Unknown')}
-Proposals: {job.get('proposals', 'Unknown')}
+analysis_cache = AnalysisCache(PROMPT_VERSION,
+                               ttl_seconds=CONFIG['analysis_cache_ttl_days'] * 86400,
+                               max_entries=CONFIG['analysis_cache_max_entries'])
 
-PROFILE:
+prefilter = PreFilter(min_rate=CONFIG['min_hourly_rate'],
+                      high_rate=CONFIG['priority_rate'],
+                      blacklist=CONFIG['prefilter_blacklist'],
+                      whitelist=CONFIG['prefilter_whitelist'])
+
+gemini_quota = QuotaGovernor(per_minute=CONFIG['gemini_requests_per_minute'],
+                             per_day=CONFIG['gemini_requests_per_day'])
+
+# Job Analysis with Gemini AI
+PROFILE_AND_CRITERIA = """PROFILE:
 - 6 years experience
 - Discord Architect
 - Web3 Community Manager
@@ -89,84 +112,220 @@ ANALYZE FOR:
 2. Rate quality ($15-20=ok, $20-30=good, $30+=excellent, under $15=skip)
 3. Scam indicators (vague description, no payment verification, unrealistic pay, asks for money)
 4. Client quality (payment verified, spending history, proposal count)
-5. Job type match (Discord, Web3, Gaming, Community vs generic VA/support)
+5. Job type match (Discord, Web3, Gaming, Community vs generic VA/support)"""
 
-Return ONLY valid JSON:
-{{
-    "score": 0-100,
+ANALYSIS_FIELDS = '''    "score": 0-100,
     "priority": "high" or "medium" or "low" or "skip",
     "is_scam": true or false,
     "why_match": "brief reason why good/bad match",
     "red_flags": ["flag1", "flag2"] or [],
-    "job_type": "Community Manager" or "Customer Support" or "Other"
+    "job_type": "Community Manager" or "Customer Support" or "Other"'''
+
+def job_block(job):
+    """Describe one job for a prompt"""
+    return f"""Title: {job['title']}
+Description: {job['description'][:500]}
+Rate: {job['rate']}
+Platform: {job['platform']}
+Client: {"Payment Verified" if job.get('client_verified') else "Not Verified"}
+Client Spent: {job.get('client_spent', 'Unknown')}
+Proposals: {job.get('proposals', 'Unknown')}"""
+
+def build_prompt(job):
+    """Build the Gemini prompt for one job"""
+    return f"""Analyze this job posting for a Discord/Web3 Community Manager with 6 years experience.
+
+JOB:
+{job_block(job)}
+
+{PROFILE_AND_CRITERIA}
+
+Return ONLY valid JSON:
+{{
+{ANALYSIS_FIELDS}
 }}"""
 
+def build_batch_prompt(jobs):
+    """Build one Gemini prompt covering several jobs"""
+    blocks = "\n\n".join(f"JOB {i}:\n{job_block(job)}" for i, job in enumerate(jobs))
+    return f"""Analyze each of these {len(jobs)} job postings for a Discord/Web3 Community Manager with 6 years experience.
+
+{blocks}
+
+{PROFILE_AND_CRITERIA}
+
+Return ONLY a valid JSON array with exactly one object per job, in any order:
+[
+  {{
+    "index": the JOB number,
+{ANALYSIS_FIELDS}
+  }}
+]"""
+
+def parse_json_response(text):
+    """Strip Markdown code fences from a Gemini reply and decode the JSON"""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else text[3:]
+        text = text.rsplit("```", 1)[0]
+    return json.loads(text)
+
+def validate_analysis(item):
+    """Return a normalized analysis dict, or None if the item is malformed"""
     try:
-        if not CONFIG['gemini_api_key']:
-            # Fallback scoring if no API key
-            return basic_scoring(job)
-        
-        response = gemini_model.generate_content(prompt)
-        text = response.text.strip()
-        
-        # Clean response
-        if text.startswith("```json"):
-            text = text[7:-3]
-        elif text.startswith("```"):
-            text = text[3:-3]
+        if item.get('priority') not in ('high', 'medium', 'low', 'skip'):
+            return None
+        score = int(item['score'])
+        if not 0 <= score <= 100 or not isinstance(item.get('is_scam'), bool):
+            return None
+        red_flags = item.get('red_flags') or []
+        if not isinstance(red_flags, list):
+            return None
+        return {
+            "score": score,
+            "priority": item['priority'],
+            "is_scam": item['is_scam'],
+            "why_match": str(item.get('why_match', '')),
+            "red_flags": [str(flag) for flag in red_flags],
+            "job_type": str(item.get('job_type', 'Unknown'))
+        }
+    except (AttributeError, KeyError, TypeError, ValueError):
+        return None
+
+def generate(prompt):
+    """Call Gemini within the request budget; raises QuotaExhausted when it is spent"""
+    if not gemini_quota.acquire():
+        metrics.inc('job_hunter_llm_requests_total', outcome='quota_exhausted')
+        raise QuotaExhausted("Gemini request budget exhausted")
+    started = time.perf_counter()
+    try:
+        response = get_gemini_model().generate_content(prompt)
+    except Exception as e:
+        if is_rate_limit_error(e):
+            gemini_quota.back_off()
+        metrics.inc('job_hunter_llm_requests_total', outcome='rate_limited' if is_rate_limit_error(e) else 'error')
+        raise
+    finally:
+        metrics.observe('job_hunter_llm_request_seconds', time.perf_counter() - started)
+    metrics.inc('job_hunter_llm_requests_total', outcome='ok')
+    return response
+
+def analyze_job(job):
+    """Use Gemini to analyze if job is good match and detect scams"""
+    
+    # Reposted or cross-listed jobs reuse their stored analysis
+    cached = analysis_cache.get(job)
+    if cached is not None:
+        return cached
+    
+    if not CONFIG['gemini_api_key']:
+        # Fallback scoring if no API key
+        return basic_scoring(job)
+    return request_analysis(job)
+
+def request_analysis(job):
+    """Ask Gemini about one job, without looking in the analysis cache first (callers
+    already have); falls back to basic_scoring if the request or reply fails"""
+    try:
+        response = generate(build_prompt(job))
+        analysis = validate_analysis(parse_json_response(response.text))
+        if analysis is None:
+            raise ValueError("malformed analysis")
         
-        analysis = json.loads(text)
+        analysis_cache.put(job, analysis)
         return analysis
     except Exception as e:
         print(f"AI analysis error: {e}")
         return basic_scoring(job)
 
+def analyze_batch(jobs):
+    """Analyze several jobs with one Gemini request.
+
+    Items missing from the reply or failing validation fall back to basic_scoring.
+    """
+    if len(jobs) == 1:
+        # analyze_jobs already missed the cache for it; a second lookup would count twice
+        return [request_analysis(jobs[0])]
+    
+    items = []
+    try:
+        response = generate(build_batch_prompt(jobs))
+        items = parse_json_response(response.text)
+        if not isinstance(items, list):
+            raise ValueError("expected a JSON array")
+    except Exception as e:
+        print(f"AI batch analysis error: {e}")
+        items = []
+    
+    by_index = {}
+    for item in items:
+        analysis = validate_analysis(item) if isinstance(item, dict) else None
+        try:
+            index = int(item['index'])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if analysis is not None and 0 <= index < len(jobs):
+            by_index.setdefault(index, analysis)
+    
+    results = []
+    for i, job in enumerate(jobs):
+        analysis = by_index.get(i)
+        if analysis is None:
+            results.append(basic_scoring(job))
+        else:
+            analysis_cache.put(job, analysis)
+            results.append(analysis)
+    
+    failed = len(jobs) - len(by_index)
+    if failed:
+        print(f"AI batch: {failed}/{len(jobs)} items fell back to basic scoring")
+    return results
+
+def analyze_jobs(jobs, counts=None):
+    """Analyze a list of jobs in tiers: cache hits first, then the local pre-filter,
+    then Gemini for whatever is left, packed into batches of
+    CONFIG['analysis_batch_size'] with up to CONFIG['analysis_concurrency']
+    requests in flight. Tier counts are added to `counts` when given."""
+    counts = counts if counts is not None else {}
+    results = [analysis_cache.get(job) for job in jobs]
+    pending = [i for i, analysis in enumerate(results) if analysis is None]
+    counts['cache_hits'] = counts.get('cache_hits', 0) + len(jobs) - len(pending)
+    
+    if CONFIG['prefilter_enabled']:
+        uncertain = []
+        for i in pending:
+            results[i] = prefilter.analyze(jobs[i])
+            if results[i] is None:
+                uncertain.append(i)
+            else:
+                key = 'prefilter_' + results[i]['priority']
+                counts[key] = counts.get(key, 0) + 1
+        pending = uncertain
+    
+    counts['llm_jobs'] = counts.get('llm_jobs', 0) + len(pending)
+    counts['llm_avoided'] = counts.get('llm_avoided', 0) + len(jobs) - len(pending)
+    
+    if not CONFIG['gemini_api_key']:
+        for i, analysis in zip(pending, score_jobs([jobs[i] for i in pending])):
+            results[i] = analysis
+        return results
+    
+    size = max(1, CONFIG['analysis_batch_size'])
+    batches = [pending[start:start + size] for start in range(0, len(pending), size)]
+    if not batches:
+        return results
+    
+    workers = max(1, min(CONFIG['analysis_concurrency'], len(batches)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        analyses = pool.map(lambda indices: analyze_batch([jobs[i] for i in indices]), batches)
+        for indices, batch in zip(batches, analyses):
+            for i, analysis in zip(indices, batch):
+                results[i] = analysis
+    return results
+
 def basic_scoring(job):
     """Fallback scoring without AI"""
-    score = 50
-    priority = "medium"
-    red_flags = []
-    
-    # Rate check
-    rate_str = job.get('rate', '').lower()
-    if any(x in rate_str for x in ['$30', '$35', '$40', '$45', '$50']):
-        score += 20
-        priority = "high"
-    elif any(x in rate_str for x in ['$25', '$28']):
-        score += 10
-    elif any(x in rate_str for x in ['$10', '$8', '$6', '$5', '$3']):
-        score -= 30
-        red_flags.append("Very low pay")
-    
-    # Title keywords
-    title = job.get('title', '').lower()
-    if any(x in title for x in ['discord', 'community manager', 'web3']):
-        score += 20
-    if 'customer support' in title:
-        score -= 15
-    
-    # Client verification
-    if job.get('client_verified'):
-        score += 15
-    else:
-        red_flags.append("No payment verification")
-    
-    # Determine priority
-    if score >= 70:
-        priority = "high"
-    elif score >= 50:
-        priority = "medium"
-    else:
-        priority = "skip"
-    
-    return {
-        "score": max(0, min(100, score)),
-        "priority": priority,
-        "is_scam": score < 30,
-        "why_match": "Basic scoring applied",
-        "red_flags": red_flags,
-        "job_type": "Unknown"
-    }
+    return score_job(job)
 
 # Send Telegram notification
 def send_telegram(message):
@@ -175,7 +334,7 @@ def send_telegram(message):
         print("Telegram not configured")
         return False
     
-    url = f"https://api.telegram.org/bot{CONFIG['telegram_bot_token']}/sendMessage"
+    url = f"{CONFIG['telegram_api_url']}/bot{CONFIG['telegram_bot_token']}/sendMessage"
     data = {
         "chat_id": CONFIG['telegram_chat_id'],
         "text": message,
@@ -184,13 +343,17 @@ def send_telegram(message):
     }
     
     try:
-        response = requests.post(url, json=data, timeout=10)
+        response = post(url, json=data, timeout=10)
         return response.status_code == 200
     except Exception as e:
         print(f"Telegram error: {e}")
         return False
 
 # Format job alert for Telegram
+def escape_markdown(text):
+    """Escape the characters Telegram's Markdown mode treats as markup (e.g. the _ in Upwork links)"""
+    return re.sub(r'([_*`\[])', r'\\\1', str(text))
+
 def format_alert(job, analysis):
     """Format job for Telegram notification"""
     
@@ -204,225 +367,700 @@ def format_alert(job, analysis):
     
     message = f"""{emoji} *NEW JOB MATCH* ({analysis['score']}/100)
 
-*{job['title']}*
-💰 Rate: {job['rate']}
-📍 Platform: {job['platform']}
+*{escape_markdown(job['title'])}*
+💰 Rate: {escape_markdown(job['rate'])}
+📍 Platform: {escape_markdown(job['platform'])}
 {"✅ Payment Verified" if job.get('client_verified') else "⚠️ Not Verified"}
 
 *Why it matches:*
-{analysis['why_match']}
+{escape_markdown(analysis['why_match'])}
 
-*Job Type:* {analysis.get('job_type', 'N/A')}
+*Job Type:* {escape_markdown(analysis.get('job_type', 'N/A'))}
 """
 
     if analysis['red_flags']:
-        message += f"\n⚠️ *Red flags:* {', '.join(analysis['red_flags'][:2])}"
+        message += f"\n⚠️ *Red flags:* {escape_markdown(', '.join(analysis['red_flags'][:2]))}"
     
-    message += f"\n\n*Apply:* {job['url']}"
+    message += f"\n\n*Apply:* {escape_markdown(job['url'])}"
     
     return message
 
+def format_digest_line(job, analysis):
+    """One job's entry in a digest of several alerts"""
+    return (f"*{escape_markdown(job['title'])}* ({analysis['score']}/100)\n"
+            f"💰 {escape_markdown(job['rate'])} · 📍 {escape_markdown(job['platform'])}\n"
+            f"{escape_markdown(job['url'])}")
+
 # Save job to database
-def save_job(job, analysis):
-    """Save job to database"""
-    conn = sqlite3.connect('jobs.db')
-    c = conn.cursor()
+INSERT_JOB_SQL = '''INSERT OR IGNORE INTO jobs 
+                    (id, title, platform, url, description, rate, 
+                     client_verified, client_spent, proposals, posted_date,
+                     score, priority, red_flags, why_match, created_at, duplicate_of)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+
+def job_row(job, analysis):
+    """Build the jobs table row for an analyzed job"""
+    return (job['id'], job['title'], job['platform'], job['url'],
+            job['description'][:500], job['rate'],
+            1 if job.get('client_verified') else 0,
+            job.get('client_spent', 'Unknown'),
+            job.get('proposals', 0),
+            job.get('posted_date', 'Unknown'),
+            analysis['score'], analysis['priority'],
+            json.dumps(analysis['red_flags']), analysis['why_match'],
+            datetime.now().isoformat(), job.get('duplicate_of'))
+
+def known_job_ids(conn, ids):
+    """Return the subset of ids already stored or archived. Ids the seen-id filter has
+    never seen are new for sure; only probable hits are checked in SQLite, in chunks."""
+    ids = [job_id for job_id in ids if seen_ids.might_contain(job_id)]
+    known = set()
+    for i in range(0, len(ids), 500):
+        chunk = ids[i:i + 500]
+        placeholders = ','.join('?' * len(chunk))
+        rows = conn.execute(f"""SELECT id FROM jobs WHERE id IN ({placeholders})
+                                UNION ALL
+                                SELECT id FROM archived_ids WHERE id IN ({placeholders})""", chunk + chunk)
+        known.update(row[0] for row in rows)
+    return known
+
+def stored_analysis(conn, job_id):
+    """Rebuild the analysis dict of a stored job"""
+    row = conn.execute("SELECT score, priority, red_flags, why_match FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if not row:
+        return None
+    score, priority, red_flags, why_match = row
+    return {"score": score, "priority": priority, "is_scam": (score or 0) < 30,
+            "why_match": why_match, "red_flags": json.loads(red_flags or '[]'), "job_type": "Unknown"}
+
+def cluster_near_duplicates(conn, jobs):
+    """Split new jobs into cluster representatives and near-duplicates.
+
+    Each job is checked against the persisted LSH index and against representatives
+    earlier in the same batch. Returns (representatives, duplicates, signatures) where
+    duplicates is a list of (job, representative_id).
+    """
+    threshold = CONFIG['near_duplicate_threshold']
+    batch = near_dup.BatchIndex()
+    representatives, duplicates, signatures = [], [], {}
     
-    try:
-        c.execute('''INSERT OR IGNORE INTO jobs 
-                     (id, title, platform, url, description, rate, 
-                      client_verified, client_spent, proposals, posted_date,
-                      score, priority, red_flags, why_match, created_at)
-                     VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                  (job['id'], job['title'], job['platform'], job['url'],
-                   job['description'][:500], job['rate'],
-                   1 if job.get('client_verified') else 0,
-                   job.get('client_spent', 'Unknown'),
-                   job.get('proposals', 0),
-                   job.get('posted_date', 'Unknown'),
-                   analysis['score'], analysis['priority'],
-                   json.dumps(analysis['red_flags']), analysis['why_match'],
-                   datetime.now().isoformat()))
-        conn.commit()
-        return True
-    except Exception as e:
-        print(f"Database error: {e}")
+    for job in jobs:
+        sig = near_dup.signature(job)
+        if sig is None:
+            representatives.append(job)
+            continue
+        rep_id = batch.find(sig, threshold) or near_dup.find_duplicate(conn, sig, threshold)
+        if rep_id:
+            duplicates.append((job, rep_id))
+        else:
+            representatives.append(job)
+            batch.add(job['id'], sig)
+            signatures[job['id']] = sig
+    
+    return representatives, duplicates, signatures
+
+# Bloom filter of every stored or archived job id, snapshotted next to the database
+def load_seen_ids():
+    """Load the seen-id filter from its snapshot (or the tables) and catch it up"""
+    return bloom.SeenIds(storage.DB_PATH + '.bloom').load(get_connection())
+
+seen_ids = load_seen_ids()
+
+def job_is_known(job_id):
+    """True if a job id is already stored or was archived"""
+    if not seen_ids.might_contain(job_id):
+        metrics.inc('job_hunter_seen_filter_total', result='new')
         return False
-    finally:
-        conn.close()
+    metrics.inc('job_hunter_seen_filter_total', result='probable')
+    return get_connection().execute("""SELECT 1 FROM jobs WHERE id = ?
+                                       UNION ALL
+                                       SELECT 1 FROM archived_ids WHERE id = ?""",
+                                    (job_id, job_id)).fetchone() is not None
 
-# Process new job
-def process_job(job):
-    """Main job processing pipeline"""
-    
-    # Check if already processed
-    conn = sqlite3.connect('jobs.db')
-    c = conn.cursor()
-    c.execute("SELECT id FROM jobs WHERE id = ?", (job['id'],))
-    if c.fetchone():
-        conn.close()
-        return
-    conn.close()
+# Batched ingest pipeline; source scans may finish at the same time, so ingest runs one batch at a time
+ingest_lock = threading.Lock()
+
+def ingest_jobs(jobs, source='all'):
+    """Dedup a batch of scraped jobs, analyze only new cluster representatives, persist
+    everything in one transaction and send alerts. Returns counts for each stage.
+    
+    `source` labels the stage timings (a source name, or 'all' for a full scan)."""
+    with ingest_lock:
+        counts = _ingest_jobs(jobs, source)
+    
+    for outcome in ('scraped', 'skipped', 'near_duplicates', 'persisted', 'queued'):
+        metrics.inc('job_hunter_jobs_total', counts[outcome], source=source, outcome=outcome)
+    for tier in ('cache_hits', 'prefilter_skip', 'prefilter_high', 'llm_jobs'):
+        metrics.inc('job_hunter_analysis_jobs_total', counts[tier], tier=tier)
+    return counts
+
+def dedup_jobs(conn, jobs):
+    """Drop jobs already stored or repeated in the batch, then cluster near-duplicates.
+    
+    Returns (new representatives, [(duplicate, representative id)], {job id: signature}).
+    """
+    # Collapse jobs listed by more than one feed in this batch
+    unique = {}
+    for job in jobs:
+        unique.setdefault(job['id'], job)
     
-    print(f"Analyzing: {job['title'][:50]}...")
+    known = known_job_ids(conn, list(unique))
+    new_jobs = [job for job_id, job in unique.items() if job_id not in known]
+    
+    # Cross-posted copies are linked to one representative instead of analyzed again
+    return cluster_near_duplicates(conn, new_jobs)
+
+def persist_jobs(rows, signatures, alerts=()):
+    """Save (job, analysis) pairs, their MinHash signatures and their queued alerts
+    in a single transaction"""
+    if not rows:
+        return 0
+    with transaction() as conn:
+        cursor = conn.executemany(INSERT_JOB_SQL, [job_row(job, analysis) for job, analysis in rows])
+        near_dup.index_signatures(conn, list(signatures.items()))
+        outbox.enqueue(conn, alerts)
+        bump_data_version(conn)
+    return cursor.rowcount
+
+def alerts_for(results):
+    """(job id, message, digest line) for every high-priority, non-scam job"""
+    alerts = []
+    for job, analysis in results:
+        if analysis['priority'] == 'high' and not analysis['is_scam']:
+            alerts.append((job['id'], format_alert(job, analysis), format_digest_line(job, analysis)))
+            print(f"🔔 High priority alert queued: {job['title'][:30]}")
+        elif analysis['priority'] == 'skip':
+            print(f"⏭️  Skipped (low score): {job['title'][:30]}")
+        else:
+            print(f"📝 Saved for review: {job['title'][:30]}")
+    return alerts
+
+def _ingest_jobs(jobs, source):
+    counts = {'scraped': len(jobs), 'skipped': 0, 'near_duplicates': 0, 'analyzed': 0,
+              'persisted': 0, 'queued': 0, 'cache_hits': 0, 'prefilter_skip': 0,
+              'prefilter_high': 0, 'llm_jobs': 0, 'llm_avoided': 0}
+    
+    conn = get_connection()
+    seen_ids.catch_up(conn)
+    with metrics.span('dedup', source):
+        new_jobs, duplicates, signatures = dedup_jobs(conn, jobs)
+    counts['near_duplicates'] = len(duplicates)
+    counts['skipped'] = len(jobs) - len(new_jobs) - len(duplicates)
     
     # Analyze with AI
-    analysis = analyze_job(job)
-    
-    # Save to database
-    save_job(job, analysis)
-    
-    # Send notification based on priority
-    if analysis['priority'] == 'high' and not analysis['is_scam']:
-        message = format_alert(job, analysis)
-        if send_telegram(message):
-            print(f"✅ High priority alert sent: {job['title'][:30]}")
-            # Mark as notified
-            conn = sqlite3.connect('jobs.db')
-            c = conn.cursor()
-            c.execute("UPDATE jobs SET notified = 1 WHERE id = ?", (job['id'],))
-            conn.commit()
-            conn.close()
-    elif analysis['priority'] == 'skip':
-        print(f"⏭️  Skipped (low score): {job['title'][:30]}")
-    else:
-        print(f"📝 Saved for review: {job['title'][:30]}")
+    for job in new_jobs:
+        print(f"Analyzing: {job['title'][:50]}...")
+    with metrics.span('analyze', source):
+        results = list(zip(new_jobs, analyze_jobs(new_jobs, counts)))
+    counts['analyzed'] = len(results)
+    
+    # Near-duplicates inherit their representative's analysis
+    analyses = {job['id']: analysis for job, analysis in results}
+    linked = []
+    for job, rep_id in duplicates:
+        analysis = analyses.get(rep_id) or stored_analysis(conn, rep_id) or basic_scoring(job)
+        analysis = dict(analysis, why_match=f"Duplicate of {rep_id}: {analysis['why_match']}")
+        linked.append((dict(job, duplicate_of=rep_id), analysis))
+        print(f"🔗 Near-duplicate of {rep_id}: {job['title'][:30]}")
+    
+    # Alerts are queued in the same transaction and delivered by the outbox dispatcher
+    alerts = alerts_for(results)
+    with metrics.span('persist', source):
+        counts['persisted'] = persist_jobs(results + linked, signatures, alerts)
+    if counts['persisted']:
+        seen_ids.catch_up(conn)
+        announce_new_jobs()
+    counts['queued'] = len(alerts)
+    if alerts:
+        dispatcher.wake()
+    
+    return counts
+
+# Process new job
+def process_job(job):
+    """Run a single job through the ingest pipeline"""
+    return ingest_jobs([job])
 
 # Job monitoring function
+def scan_sources(names=None):
+    """Scrape the given sources (all by default) and ingest what they found.
+    
+    Returns (per-source scrape results, ingest counts).
+    """
+    from engine import scrape_all
+    
+    label = names[0] if names and len(names) == 1 else 'all'
+    seen_ids.catch_up(get_connection())  # another worker may have been the scanner until now
+    with metrics.span('scan', label):
+        results = scrape_all(names,
+                             max_workers=CONFIG['scrape_concurrency'],
+                             host_rate=CONFIG['host_requests_per_second'],
+                             is_known=job_is_known)
+        
+        jobs = []
+        for source, result in results.items():
+            print(f"{source}: {len(result['jobs'])} jobs from {result['pages']} pages "
+                  f"({result['not_modified']} unchanged) in {result['seconds']:.1f}s "
+                  f"({result['errors']} errors)")
+            jobs.extend(result['jobs'])
+        
+        counts = ingest_jobs(jobs, label)
+    
+    # Only now that the pages' jobs are stored can a 304 safely stand for "nothing new"
+    save_validators([v for result in results.values() for v in result['validators']])
+    seen_ids.save()
+    for source in results:
+        metrics.inc('job_hunter_scans_total', source=source)
+        metrics.set_gauge('job_hunter_last_scan_timestamp_seconds', time.time(), source=source)
+    print(f"✅ Scan complete. {counts['persisted']} new jobs saved "
+          f"({counts['scraped']} scraped, {counts['skipped']} already seen, "
+          f"{counts['near_duplicates']} near-duplicates, "
+          f"{counts['analyzed']} analyzed, {counts['queued']} alerts queued).")
+    print(f"   AI: {counts['llm_jobs']} jobs sent to Gemini, {counts['llm_avoided']} avoided "
+          f"({counts['cache_hits']} cached, {counts['prefilter_skip']} pre-skipped, "
+          f"{counts['prefilter_high']} pre-matched).\n")
+    return results, counts
+
+# Scan progress reported by /health. Scans in progress are counted per process (only
+# the leader scans); when the last scans finished is kept in the database, since
+# workers that never win the lease never scan. 'ready' turns true once a full scan is done.
+scan_status = {'running': 0}
+scan_status_lock = threading.Lock()
+
+def _scan_started():
+    with scan_status_lock:
+        scan_status['running'] += 1
+
+def _scan_finished(error=None, full=False):
+    with scan_status_lock:
+        scan_status['running'] -= 1
+    
+    finished = (datetime.now().isoformat(), str(error) if error else None)
+    try:
+        with transaction() as conn:
+            conn.executemany("INSERT OR REPLACE INTO scans (kind, finished_at, error) VALUES (?, ?, ?)",
+                             [(kind,) + finished for kind in (('any', 'full') if full else ('any',))])
+    except Exception as e:
+        print(f"Could not record scan status: {e}")
+
+def last_scans():
+    """{kind: (finished_at, error)} for the last 'any' and 'full' scans, from the database"""
+    rows = get_connection().execute("SELECT kind, finished_at, error FROM scans").fetchall()
+    return {kind: (finished_at, error) for kind, finished_at, error in rows}
+
 def monitor_jobs():
-    """Main monitoring function - called periodically"""
+    """Main monitoring function - scans every source once"""
     print(f"\n[{datetime.now().strftime('%H:%M:%S')}] 🔍 Scanning for jobs...")
     
-    jobs_found = 0
+    _scan_started()
+    error = None
+    try:
+        scan_sources()
+    except Exception as e:
+        error = e
+        print(f"Monitor error: {e}")
+    finally:
+        _scan_finished(error, full=True)
+
+# Per-source polling intervals, adapted after every scan of that source
+source_intervals = {}
+
+def scan_source(name):
+    """Scheduled scan of a single source; reschedules it by how productive it was.
+    
+    Does nothing in workers that do not hold the scanner lease."""
+    if not leader.is_held():
+        return
+    
+    print(f"\n[{datetime.now().strftime('%H:%M:%S')}] 🔍 Scanning {name}...")
     
+    _scan_started()
+    error = None
     try:
-        # Import scrapers (will create these next)
-        from scrapers import scrape_upwork, scrape_weworkremotely, scrape_cryptojobs
-        
-        # Scrape Upwork
-        try:
-            upwork_jobs = scrape_upwork()
-            for job in upwork_jobs:
-                process_job(job)
-                jobs_found += 1
-        except Exception as e:
-            print(f"Upwork scraper error: {e}")
-        
-        # Scrape We Work Remotely
-        try:
-            wwr_jobs = scrape_weworkremotely()
-            for job in wwr_jobs:
-                process_job(job)
-                jobs_found += 1
-        except Exception as e:
-            print(f"WWR scraper error: {e}")
-        
-        # Scrape CryptoJobsList
-        try:
-            crypto_jobs = scrape_cryptojobs()
-            for job in crypto_jobs:
-                process_job(job)
-                jobs_found += 1
-        except Exception as e:
-            print(f"CryptoJobs scraper error: {e}")
-        
-        print(f"✅ Scan complete. Found {jobs_found} new jobs.\n")
+        results, _ = scan_sources([name])
+        result = results[name]
         
+        # Jobs the parsers returned were already filtered to unseen ids
+        interval = source_intervals[name]
+        before = interval.minutes
+        after = interval.update(len(result['jobs']), result['errors'])
+        if after != before:
+            scheduler.reschedule_job(f"scan:{name}", trigger="interval", minutes=after)
+            print(f"⏱️  {name} now polled every {after:.1f} min")
     except Exception as e:
-        print(f"Monitor error: {e}")
+        error = e
+        print(f"{name} scan error: {e}")
+    finally:
+        _scan_finished(error)
+
+# Leader election: every gunicorn worker serves requests, but only the one holding
+# the scanner lease runs scheduled scans
+leader = LeaderLease('scanner', ttl_seconds=CONFIG['leader_lease_seconds'])
+
+def renew_leadership():
+    """Take or keep the scanner lease; a worker that just became leader scans right away"""
+    was_leader = leader.is_held()
+    is_leader = leader.acquire()
+    if is_leader and not was_leader:
+        print(f"👑 {leader.holder} is now the scanning worker")
+        threading.Thread(target=start_leading, name='leader-scan', daemon=True).start()
+    elif was_leader and not is_leader:
+        print(f"{leader.holder} lost the scanner lease")
+
+def start_leading():
+    """Finish data migrations left for the scanning worker, then scan"""
+    try:
+        rewrite_stable_ids()
+    except Exception as e:
+        print(f"Stable id rewrite error: {e}")
+    threading.Thread(target=backfill_near_duplicates, name='minhash-backfill', daemon=True).start()
+    monitor_jobs()
+
+# Stable job id rewrite flagged by migration 1, run before this worker ingests anything
+def rewrite_stable_ids():
+    """Rewrite stored job ids to their stable form, holding off ingest until it is done"""
+    with ingest_lock:
+        if storage.rewrite_stable_ids() is not None:
+            # Renamed rows keep their rowids, which catch_up cannot see
+            seen_ids.rebuild(get_connection())
+
+# Near-duplicate index backfill for jobs stored before the index existed; scanning worker only
+def backfill_near_duplicates():
+    """Index older jobs for near-duplicate detection, a batch at a time, while this worker leads"""
+    try:
+        indexed = near_dup.backfill_signatures(should_stop=lambda: not leader.is_held())
+        if indexed:
+            print(f"Indexed {indexed} older jobs for near-duplicate detection")
+    except Exception as e:
+        print(f"Near-duplicate backfill error: {e}")
+
+# Retention: runs on the scanning worker while no scan is in progress
+def run_retention():
+    """Drop old skipped jobs, archive old jobs, purge the outbox and compact the database"""
+    if not leader.is_held() or scan_status['running']:
+        return
+    
+    try:
+        with metrics.span('retention'):
+            counts = retention.run(skip_days=CONFIG['retention_skip_days'],
+                                   archive_days=CONFIG['retention_archive_days'],
+                                   outbox_days=CONFIG['retention_outbox_days'],
+                                   should_stop=lambda: scan_status['running'] > 0)
+        print(f"🧹 Retention: {counts['dropped']} skipped jobs dropped, {counts['archived']} archived, "
+              f"{counts['outbox_purged']} old alerts purged, {counts['pages_released']} pages released")
+    except Exception as e:
+        print(f"Retention error: {e}")
+
+# Telegram delivery from the outbox, run by the scanning worker only
+dispatcher = outbox.Dispatcher(send_telegram,
+                               rate=CONFIG['telegram_messages_per_second'],
+                               digest_threshold=CONFIG['telegram_digest_threshold'],
+                               max_attempts=CONFIG['telegram_max_attempts'],
+                               retry_seconds=CONFIG['telegram_retry_seconds'],
+                               is_active=leader.is_held)
+
+# Response caching: rendered bodies are reused until the data version changes (or the
+# day rolls over, which moves the 7-day windows), and served with strong ETags
+response_cache = ResponseCache(max_entries=CONFIG['response_cache_entries'],
+                               max_bytes=CONFIG['response_cache_bytes'])
+
+def cached_response(view):
+    """Serve a GET route from the response cache, answering If-None-Match with 304"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        version = data_version()
+        key = (request.path, request.query_string, date.today().isoformat())
+        entry = response_cache.get(key, version)
+        if entry is None:
+            response = app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            body, mimetype = response.get_data(), response.mimetype
+            etag = response_cache.put(key, version, body, mimetype)
+            result = 'miss'
+        else:
+            body, mimetype, etag = entry
+            result = 'hit'
+        
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        response = response.make_conditional(request)
+        if response.status_code == 304:
+            result = 'not_modified'
+        metrics.inc('job_hunter_response_cache_total', route=request.path, result=result)
+        return response
+    return wrapper
 
 # Flask routes
+def dashboard_stats():
+    """Counters shown at the top of the dashboard, from the daily rollups"""
+    week = rollups.totals(days=7)
+    return {'total_week': week['total'],
+            'high_priority': week['high_priority'],
+            'scams_filtered': rollups.totals()['scams_filtered']}
+
 @app.route('/')
+@cached_response
 def dashboard():
     """Main dashboard"""
-    conn = sqlite3.connect('jobs.db')
-    c = conn.cursor()
-    
-    # Get stats
-    c.execute("SELECT COUNT(*) FROM jobs WHERE created_at >= date('now', '-7 days')")
-    total_week = c.fetchone()[0]
-    
-    c.execute("SELECT COUNT(*) FROM jobs WHERE priority = 'high' AND created_at >= date('now', '-7 days')")
-    high_priority = c.fetchone()[0]
-    
-    c.execute("SELECT COUNT(*) FROM jobs WHERE score < 40")
-    scams_filtered = c.fetchone()[0]
+    c = get_connection().cursor()
     
     # Get recent jobs
     c.execute("""SELECT title, platform, rate, score, priority, created_at, url 
                  FROM jobs 
-                 WHERE priority != 'skip'
+                 WHERE priority != 'skip' AND duplicate_of IS NULL
                  ORDER BY created_at DESC 
                  LIMIT 20""")
     recent_jobs = c.fetchall()
     
-    conn.close()
+    # The live feed picks up from the newest row rendered here
+    stream_since = c.execute("SELECT COALESCE(MAX(rowid), 0) FROM jobs").fetchone()[0]
     
     return render_template('dashboard.html',
-                          total_week=total_week,
-                          high_priority=high_priority,
-                          scams_filtered=scams_filtered,
-                          recent_jobs=recent_jobs)
+                          recent_jobs=recent_jobs,
+                          stream_since=stream_since,
+                          **dashboard_stats())
 
-@app.route('/api/jobs')
-def api_jobs():
-    """API endpoint for jobs"""
-    priority = request.args.get('priority', 'all')
+# Live feed: in-process wakeup for open /api/stream connections when a scan saves jobs.
+# Streams in other gunicorn workers notice new rows on their next poll instead.
+new_jobs_signal = threading.Condition()
+stream_slots = threading.BoundedSemaphore(CONFIG['stream_max_connections'])
+
+def announce_new_jobs():
+    with new_jobs_signal:
+        new_jobs_signal.notify_all()
+
+STREAM_COLUMNS = ['title', 'platform', 'rate', 'score', 'priority', 'created_at', 'url']
+
+def stream_events(last_rowid):
+    """Server-sent events for jobs saved after `last_rowid`.
+    
+    Each 'update' event carries the new dashboard-visible jobs and fresh counters, with
+    the last rowid as its event id so a reconnecting browser resumes where it left off.
+    """
+    deadline = time.monotonic() + CONFIG['stream_max_seconds']
+    yield "retry: 5000\n\n"
+    
+    while time.monotonic() < deadline:
+        rows = get_connection().execute(
+            f"""SELECT rowid, {', '.join(STREAM_COLUMNS)}, duplicate_of FROM jobs
+                WHERE rowid > ? ORDER BY rowid LIMIT 100""", (last_rowid,)).fetchall()
+        if rows:
+            last_rowid = rows[-1][0]
+            jobs = [dict(zip(STREAM_COLUMNS, row[1:-1])) for row in rows
+                    if row[5] != 'skip' and row[-1] is None]
+            data = json.dumps({'jobs': jobs, 'stats': dashboard_stats()})
+            yield f"id: {last_rowid}\nevent: update\ndata: {data}\n\n"
+            continue
+        
+        with new_jobs_signal:
+            new_jobs_signal.wait(CONFIG['stream_poll_seconds'])
+        yield ": keepalive\n\n"
+
+@app.route('/api/stream')
+def api_stream():
+    """Live feed of newly saved jobs as server-sent events.
     
-    conn = sqlite3.connect('jobs.db')
-    c = conn.cursor()
+    Resumes after the Last-Event-ID header or ?since= rowid; without either it starts
+    from the newest job. Answers 503 once stream_max_connections streams are open, so
+    long-lived feeds cannot take every worker thread; the dashboard then falls back to
+    reloading.
+    """
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        last_rowid = int(since) if since is not None else None
+    except ValueError:
+        return jsonify({'error': 'since must be a job rowid'}), 400
+    if last_rowid is None:
+        last_rowid = get_connection().execute("SELECT COALESCE(MAX(rowid), 0) FROM jobs").fetchone()[0]
     
+    if not stream_slots.acquire(blocking=False):
+        return jsonify({'error': 'too many live feeds open'}), 503, {'Retry-After': '300'}
+    response = Response(stream_events(last_rowid), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(stream_slots.release)
+    return response
+
+# Columns /api/jobs can return via ?fields=
+JOB_COLUMNS = ['id', 'title', 'platform', 'url', 'description', 'rate', 'client_verified',
+               'client_spent', 'proposals', 'posted_date', 'score', 'priority', 'red_flags',
+               'why_match', 'notified', 'created_at', 'duplicate_of']
+
+def encode_cursor(created_at, job_id):
+    """Opaque keyset cursor for the row a page ended on"""
+    return base64.urlsafe_b64encode(json.dumps([created_at, job_id]).encode()).decode()
+
+def decode_cursor(cursor):
+    created_at, job_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return str(created_at), str(job_id)
+
+def jobs_query(args):
+    """Turn /api/jobs query parameters into (fields, where clauses, params, limit).
+
+    Raises ValueError on a malformed parameter.
+    """
+    fields = JOB_COLUMNS
+    if args.get('fields'):
+        fields = [f.strip() for f in args['fields'].split(',') if f.strip()]
+        unknown = [f for f in fields if f not in JOB_COLUMNS]
+        if unknown or not fields:
+            raise ValueError(f"unknown fields: {', '.join(unknown) or '(none)'}")
+    
+    where, params = [], []
+    priority = args.get('priority', 'all')
     if priority == 'all':
-        c.execute("""SELECT * FROM jobs WHERE priority != 'skip' 
-                     ORDER BY created_at DESC LIMIT 50""")
+        where.append("priority != 'skip'")
     else:
-        c.execute("""SELECT * FROM jobs WHERE priority = ? 
-                     ORDER BY created_at DESC LIMIT 50""", (priority,))
+        where.append("priority = ?")
+        params.append(priority)
+    
+    if args.get('platform'):
+        where.append("platform = ?")
+        params.append(args['platform'])
+    if args.get('min_score'):
+        where.append("score >= ?")
+        params.append(int(args['min_score']))
+    if args.get('since'):
+        where.append("created_at >= ?")
+        params.append(datetime.fromisoformat(args['since']).isoformat())
+    if args.get('until'):
+        where.append("created_at < ?")
+        params.append(datetime.fromisoformat(args['until']).isoformat())
+    if args.get('notified'):
+        flag = args['notified'].lower()
+        if flag not in ('0', '1', 'true', 'false'):
+            raise ValueError("notified must be 0, 1, true or false")
+        where.append("notified = ?")
+        params.append(1 if flag in ('1', 'true') else 0)
+    if args.get('cursor'):
+        try:
+            created_at, job_id = decode_cursor(args['cursor'])
+        except Exception:
+            raise ValueError("invalid cursor")
+        where.append("(created_at, id) < (?, ?)")
+        params.extend([created_at, job_id])
+    
+    limit = min(max(int(args.get('limit', 50)), 1), 200)
+    return fields, where, params, limit
+
+@app.route('/api/jobs')
+@cached_response
+def api_jobs():
+    """API endpoint for jobs, newest first, paged with ?cursor= (keyset on created_at, id).
+    
+    Filters: priority, platform, min_score, since, until, notified. Use ?fields= to pick
+    columns (all by default) and ?limit= (max 200).
+    """
+    try:
+        fields, where, params, limit = jobs_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # Always read the keyset columns so the next cursor can be built
+    columns = fields + [c for c in ('created_at', 'id') if c not in fields]
+    c = get_connection().cursor()
+    c.execute(f"""SELECT {', '.join(columns)} FROM jobs 
+                  WHERE {' AND '.join(where)} 
+                  ORDER BY created_at DESC, id DESC LIMIT ?""", params + [limit + 1])
+    rows = c.fetchall()
     
-    jobs = c.fetchall()
-    conn.close()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = dict(zip(columns, rows[-1]))
+        next_cursor = encode_cursor(last['created_at'], last['id'])
     
     return jsonify({
-        'jobs': [dict(zip([d[0] for d in c.description], job)) for job in jobs]
+        'jobs': [dict(zip(fields, row)) for row in rows],
+        'next_cursor': next_cursor
     })
 
 @app.route('/api/stats')
+@cached_response
 def api_stats():
     """API endpoint for statistics"""
-    conn = sqlite3.connect('jobs.db')
-    c = conn.cursor()
-    
     # Last 7 days stats
-    c.execute("""SELECT 
-                    COUNT(*) as total,
-                    SUM(CASE WHEN priority = 'high' THEN 1 ELSE 0 END) as high,
-                    SUM(CASE WHEN priority = 'medium' THEN 1 ELSE 0 END) as medium,
-                    SUM(CASE WHEN score < 40 THEN 1 ELSE 0 END) as scams
-                 FROM jobs 
-                 WHERE created_at >= date('now', '-7 days')""")
+    stats = rollups.totals(days=7)
+    stats['platforms'] = rollups.by_platform(days=7)
     
-    stats = c.fetchone()
-    conn.close()
+    return jsonify(stats)
+
+@app.route('/api/search')
+def api_search():
+    """Full-text search over job titles, descriptions and match reasons, ranked by bm25.
     
-    return jsonify({
-        'total': stats[0],
-        'high_priority': stats[1],
-        'medium_priority': stats[2],
-        'scams_filtered': stats[3]
-    })
+    ?q= is the search text; ?mode=any matches any word instead of all of them.
+    """
+    text = request.args.get('q', '').strip()
+    mode = request.args.get('mode', 'all')
+    if not text:
+        return jsonify({'error': 'q is required'}), 400
+    if mode not in ('all', 'any'):
+        return jsonify({'error': 'mode must be all or any'}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    
+    return jsonify({'query': text, 'results': search_jobs(text, mode, limit)})
 
 @app.route('/health')
 def health():
-    """Health check for Render"""
-    return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
+    """Health check for Render; answers as soon as the app is up, with scan progress alongside"""
+    with scan_status_lock:
+        running = scan_status['running'] > 0
+    scans = last_scans()
+    last_scan, last_error = scans.get('any', (None, None))
+    scan = {'ready': 'full' in scans, 'running': running,
+            'last_scan': last_scan, 'last_error': last_error,
+            'last_full_scan': scans.get('full', (None, None))[0]}
+    return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat(),
+                    'leader': leader.is_held(), 'scan': scan})
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus metrics: stage timings, LLM latency, cache and 304 ratios, DB write time"""
+    fetches = metrics.total('job_hunter_http_responses_total')
+    if fetches:
+        metrics.set_gauge('job_hunter_http_not_modified_ratio',
+                          metrics.total('job_hunter_http_responses_total', result='not_modified') / fetches)
+    metrics.set_gauge('job_hunter_analysis_cache_hit_ratio', analysis_cache.stats()['hit_ratio'])
+    for window, left in gemini_quota.remaining().items():
+        metrics.set_gauge('job_hunter_gemini_quota_remaining', left, window=window)
+    metrics.set_gauge('job_hunter_outbox_pending', dispatcher.pending())
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+# Scheduler setup: one job per registered source
+def schedule_sources():
+    """Add an interval job for every registered source"""
+    from scrapers import SOURCES
+    from engine import AdaptiveInterval
+    
+    for name, source in SOURCES.items():
+        interval = source_intervals[name] = AdaptiveInterval(
+            source['interval_minutes'], source['min_interval_minutes'], source['max_interval_minutes'])
+        scheduler.add_job(func=scan_source, trigger="interval", minutes=interval.minutes, args=[name],
+                          id=f"scan:{name}", max_instances=1, coalesce=True)
+
+# Offline tools (see bench/) import the app with JOB_HUNTER_NO_SCHEDULER=1 and drive scans themselves
+RUN_SCHEDULER = os.environ.get('JOB_HUNTER_NO_SCHEDULER') != '1'
 
-# Scheduler setup
 scheduler = BackgroundScheduler()
-scheduler.add_job(func=monitor_jobs, trigger="interval", minutes=CONFIG['check_interval_minutes'])
-scheduler.start()
+if RUN_SCHEDULER:
+    schedule_sources()
+    scheduler.add_job(func=renew_leadership, trigger="interval", seconds=CONFIG['leader_lease_seconds'] / 3,
+                      id="leader", max_instances=1, coalesce=True)
+    scheduler.add_job(func=run_retention, trigger="interval", hours=CONFIG['retention_interval_hours'],
+                      id="retention", max_instances=1, coalesce=True)
+    scheduler.start()
+    dispatcher.start()
+    atexit.register(leader.release)
 
-# Run initial scan on startup
-monitor_jobs()
+# Run initial scan on startup, in the background so gunicorn can serve requests right away;
+# only the worker that wins the lease scans
+if RUN_SCHEDULER:
+    renew_leadership()
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
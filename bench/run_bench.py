@@ -0,0 +1,381 @@
+"""End-to-end scan benchmark against recorded fixtures.
+
+Replays the pages in bench/fixtures through a local stand-in server, answers
+Gemini with a stub model and Telegram with a stub endpoint, then runs
+monitor_jobs() end to end on a fresh database for every run. Nothing touches
+the network.
+
+    python bench/run_bench.py                      # 5 runs, report to stdout
+    python bench/run_bench.py --json out.json      # also save the report
+    python bench/run_bench.py --baseline out.json  # exit 1 if slower than a saved report
+    python bench/run_bench.py --record             # refresh fixtures from the live sites
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import math
+import os
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'bench', 'fixtures')
+sys.path.insert(0, ROOT)
+
+# The app must not start its own scheduler or write to the real database
+WORK_DIR = tempfile.mkdtemp(prefix='job-hunter-bench-')
+os.environ['JOB_HUNTER_NO_SCHEDULER'] = '1'
+os.environ['JOBS_DB_PATH'] = os.path.join(WORK_DIR, 'warmup.db')
+
+def load_manifest():
+    """{source name: [fixture file per registered URL, in order]}"""
+    with open(os.path.join(FIXTURES, 'manifest.json')) as f:
+        return json.load(f)
+
+# Stand-in server: fixtures on GET /fixtures/<name>, Telegram on POST /bot<token>/sendMessage
+class StubHandler(BaseHTTPRequestHandler):
+    telegram_latency = 0.0
+    messages = []
+
+    def do_GET(self):
+        name = os.path.basename(self.path.split('?', 1)[0])
+        path = os.path.join(FIXTURES, name)
+        if not self.path.startswith('/fixtures/') or not os.path.isfile(path):
+            self.send_error(404)
+            return
+
+        with open(path, 'rb') as f:
+            body = f.read()
+        etag = '"%s"' % hashlib.sha1(body).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml' if name.endswith('.xml') else 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if not re.match(r'^/bot[^/]+/sendMessage$', self.path):
+            self.send_error(404)
+            return
+
+        time.sleep(self.telegram_latency)
+        StubHandler.messages.append(json.loads(body))
+        reply = b'{"ok": true, "result": {}}'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+# Stub Gemini: answers single and batch prompts with deterministic, valid JSON
+class StubResponse:
+    def __init__(self, text):
+        self.text = text
+
+class StubGemini:
+    def __init__(self, latency=0.5):
+        self.latency = latency
+
+    def analysis(self, title):
+        score = int(hashlib.sha1(title.encode()).hexdigest(), 16) % 101
+        priority = 'high' if score >= 70 else 'medium' if score >= 50 else 'skip'
+        return {"score": score, "priority": priority, "is_scam": score < 30,
+                "why_match": f"Stub analysis of {title[:40]}", "red_flags": [],
+                "job_type": "Community Manager"}
+
+    def generate_content(self, prompt):
+        time.sleep(self.latency)
+        batch = re.findall(r'^JOB (\d+):\nTitle: (.*)$', prompt, re.MULTILINE)
+        if batch:
+            items = [dict(self.analysis(title), index=int(i)) for i, title in batch]
+            return StubResponse("```json\n" + json.dumps(items) + "\n```")
+        title = re.search(r'^Title: (.*)$', prompt, re.MULTILINE).group(1)
+        return StubResponse(json.dumps(self.analysis(title)))
+
+# Instrumentation
+class Recorder:
+    """Per-stage durations and SQLite statement counts for one benchmark"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.durations = {}
+        self.writes = 0
+        self.commits = 0
+
+    def record(self, stage, seconds):
+        with self.lock:
+            self.durations.setdefault(stage, []).append(seconds)
+
+    def timed(self, stage, func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+        return wrapper
+
+    def trace(self, statement):
+        keyword = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ''
+        with self.lock:
+            if keyword in ('INSERT', 'UPDATE', 'DELETE', 'REPLACE'):
+                self.writes += 1
+            elif keyword == 'COMMIT':
+                self.commits += 1
+
+    def traced_connection(self, get_connection):
+        @wraps(get_connection)
+        def wrapper():
+            conn = get_connection()
+            conn.set_trace_callback(self.trace)
+            return conn
+        return wrapper
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024  # bytes on macOS, KB elsewhere
+
+def instrument(app, recorder):
+    """Wrap every pipeline stage of the imported app with timers"""
+    import engine
+    import storage
+    from scrapers import SOURCES
+
+    engine.fetch_page = recorder.timed('fetch', engine.fetch_page)
+    for source in SOURCES.values():
+        source['parser'] = recorder.timed('parse', source['parser'])
+    app.dedup_jobs = recorder.timed('dedup', app.dedup_jobs)
+    app.analyze_jobs = recorder.timed('analyze', app.analyze_jobs)
+    app.generate = recorder.timed('llm_request', app.generate)
+    app.persist_jobs = recorder.timed('persist', app.persist_jobs)
+    app.dispatcher.dispatch = recorder.timed('notify', app.dispatcher.dispatch)
+    storage.get_connection = recorder.traced_connection(storage.get_connection)
+    for module in (app, engine, sys.modules['analysis_cache'], sys.modules['http_client'], sys.modules['rollups']):
+        if hasattr(module, 'get_connection'):
+            module.get_connection = storage.get_connection
+
+def configure(app, base_url, args):
+    """Point the app's sources, Gemini and Telegram at the local stand-ins"""
+    from quota import QuotaGovernor
+    from scrapers import SOURCES
+
+    for name, files in load_manifest().items():
+        SOURCES[name]['urls'] = [f"{base_url}/fixtures/{f}" for f in files]
+        SOURCES[name]['host_rate'] = args.host_rate
+
+    app.CONFIG.update({
+        'gemini_api_key': 'bench',
+        'telegram_bot_token': 'bench',
+        'telegram_chat_id': 'bench',
+        'telegram_api_url': base_url,
+        'host_requests_per_second': args.host_rate,
+    })
+    app.gemini_model = StubGemini(args.llm_latency)
+    # The free-tier budget would turn a long benchmark into a test of the quota governor
+    app.gemini_quota = QuotaGovernor(per_minute=10 ** 6, per_day=10 ** 9)
+
+def fresh_database(app, path):
+    """Switch the app to an empty database at `path`"""
+    import storage
+
+    storage.DB_PATH = path
+    storage.init_db()
+    app.analysis_cache.memory.clear()
+    app.seen_ids = app.load_seen_ids()
+
+# Benchmark
+def run(args):
+    with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+        import app
+
+    server, base_url = start_server()
+    StubHandler.telegram_latency = args.telegram_latency
+    recorder = Recorder()
+    configure(app, base_url, args)
+    instrument(app, recorder)
+
+    # monitor_jobs() only logs failures, so keep what each scan returned
+    scans = []
+    scan_sources = app.scan_sources
+    def capture(names=None):
+        scans.append(scan_sources(names))
+        return scans[-1]
+    app.scan_sources = capture
+
+    runs = []
+    for n in range(args.warmup + args.runs):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+            fresh_database(app, os.path.join(WORK_DIR, f'run-{n}.db'))
+            recorder.durations.clear()
+            recorder.writes = recorder.commits = 0
+            StubHandler.messages.clear()
+
+            started = time.perf_counter()
+            app.monitor_jobs()
+            app.dispatcher.dispatch()  # the outbox dispatcher thread is not running here
+            elapsed = time.perf_counter() - started
+        if not scans:
+            raise RuntimeError("scan failed:\n" + output.getvalue())
+        _, counts = scans.pop()
+
+        if n < args.warmup:
+            continue
+        runs.append({
+            'seconds': elapsed,
+            'scraped': counts['scraped'],
+            'persisted': counts['persisted'],
+            'llm_jobs': counts['llm_jobs'],
+            'queued': counts['queued'],
+            'telegram_messages': len(StubHandler.messages),
+            'sqlite_writes': recorder.writes,
+            'sqlite_commits': recorder.commits,
+            'stages': {stage: list(values) for stage, values in recorder.durations.items()},
+        })
+
+    server.shutdown()
+    return report(runs)
+
+def report(runs):
+    """Aggregate per-run measurements into the benchmark report"""
+    stages = {}
+    for run in runs:
+        for stage, values in run['stages'].items():
+            stages.setdefault(stage, []).extend(values)
+    stages['scan'] = [run['seconds'] for run in runs]
+
+    total_seconds = sum(run['seconds'] for run in runs)
+    return {
+        'runs': len(runs),
+        'jobs_per_second': sum(run['scraped'] for run in runs) / total_seconds if total_seconds else 0.0,
+        'jobs_scraped': runs[0]['scraped'] if runs else 0,
+        'jobs_persisted': runs[0]['persisted'] if runs else 0,
+        'llm_jobs': runs[0]['llm_jobs'] if runs else 0,
+        'alerts_queued': runs[0]['queued'] if runs else 0,
+        'telegram_messages': runs[0]['telegram_messages'] if runs else 0,
+        'sqlite_writes_per_scan': sum(run['sqlite_writes'] for run in runs) / len(runs) if runs else 0,
+        'sqlite_commits_per_scan': sum(run['sqlite_commits'] for run in runs) / len(runs) if runs else 0,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'stages': {stage: {'calls': len(values),
+                           'p50_ms': percentile(values, 0.5) * 1000,
+                           'p95_ms': percentile(values, 0.95) * 1000,
+                           'total_ms': sum(values) * 1000}
+                   for stage, values in stages.items()},
+    }
+
+STAGE_ORDER = ['fetch', 'parse', 'dedup', 'analyze', 'llm_request', 'persist', 'notify', 'scan']
+
+def print_report(result):
+    print(f"\nRuns: {result['runs']}   Jobs per scan: {result['jobs_scraped']} scraped, "
+          f"{result['jobs_persisted']} saved, {result['llm_jobs']} sent to the LLM, "
+          f"{result['alerts_queued']} alerts in {result['telegram_messages']} Telegram messages")
+    print(f"Throughput: {result['jobs_per_second']:.1f} jobs/s")
+    print(f"SQLite per scan: {result['sqlite_writes_per_scan']:.0f} write statements, "
+          f"{result['sqlite_commits_per_scan']:.0f} commits")
+    print(f"Peak RSS: {result['peak_rss_mb']:.1f} MB\n")
+    print(f"{'stage':<12} {'calls':>6} {'p50 ms':>10} {'p95 ms':>10} {'total ms':>10}")
+    for stage in STAGE_ORDER:
+        if stage in result['stages']:
+            s = result['stages'][stage]
+            print(f"{stage:<12} {s['calls']:>6} {s['p50_ms']:>10.2f} {s['p95_ms']:>10.2f} {s['total_ms']:>10.1f}")
+
+def compare(result, baseline, tolerance):
+    """Regressions against a saved report: throughput drops and p95 increases beyond `tolerance`"""
+    problems = []
+    if result['jobs_per_second'] < baseline['jobs_per_second'] * (1 - tolerance):
+        problems.append(f"throughput {result['jobs_per_second']:.1f} jobs/s "
+                        f"(baseline {baseline['jobs_per_second']:.1f})")
+    for stage, stats in result['stages'].items():
+        before = baseline['stages'].get(stage)
+        if before and stats['p95_ms'] > before['p95_ms'] * (1 + tolerance) + 1:
+            problems.append(f"{stage} p95 {stats['p95_ms']:.2f} ms (baseline {before['p95_ms']:.2f} ms)")
+    return problems
+
+# Fixture recording
+def record():
+    """Fetch every registered source URL from the live site into its fixture file"""
+    import requests
+    from scrapers import SOURCES
+
+    for name, files in load_manifest().items():
+        source = SOURCES[name]
+        for url, filename in zip(source['urls'], files):
+            response = requests.get(url, headers=source['headers'], timeout=15)
+            if response.status_code != 200:
+                print(f"Skipped {url}: HTTP {response.status_code}")
+                continue
+            with open(os.path.join(FIXTURES, filename), 'wb') as f:
+                f.write(response.content)
+            print(f"Recorded {url} -> {filename} ({len(response.content)} bytes)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n', 1)[0])
+    parser.add_argument('--runs', type=int, default=5, help='measured scans (default 5)')
+    parser.add_argument('--warmup', type=int, default=1, help='unmeasured scans first (default 1)')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='seconds per stub Gemini call')
+    parser.add_argument('--telegram-latency', type=float, default=0.05, help='seconds per stub Telegram call')
+    parser.add_argument('--host-rate', type=float, default=1000.0,
+                        help='requests/s per host; 0.5 reproduces the production politeness delay')
+    parser.add_argument('--json', help='write the report to this file')
+    parser.add_argument('--baseline', help='compare with a saved report and exit 1 on regression')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed slowdown vs baseline (default 0.2)')
+    parser.add_argument('--record', action='store_true', help='refresh fixtures from the live sites and exit')
+    parser.add_argument('--verbose', action='store_true', help="show the app's own output")
+    args = parser.parse_args()
+
+    try:
+        if args.record:
+            record()
+            return 0
+
+        result = run(args)
+        print_report(result)
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(result, f, indent=2)
+
+        if args.baseline:
+            with open(args.baseline) as f:
+                problems = compare(result, json.load(f), args.tolerance)
+            for problem in problems:
+                print(f"❌ Regression: {problem}")
+            if problems:
+                return 1
+            print("✅ No regressions against baseline")
+        return 0
+    finally:
+        shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,142 @@
+import hashlib
+import json
+import math
+import os
+import threading
+
+# Bloom filter
+class BloomFilter:
+    """Fixed-size Bloom filter over strings with double hashing.
+
+    Sized for `capacity` items at `error_rate` false positives; never gives a false
+    negative.
+    """
+
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.bits = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / self.capacity * math.log(2)))
+        self.data = bytearray((self.bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.bits for i in range(self.hashes)]
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.data[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        return all(self.data[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+# Seen job ids, mirrored from the database
+class SeenIds:
+    """Bloom filter of every job id in `jobs` and `archived_ids`.
+
+    Lets dedup reject brand-new ids without touching SQLite; a probable hit still has
+    to be confirmed there. The filter is saved to `snapshot_path` and, on load, only
+    rows added since the snapshot are read. Call catch_up() after writing jobs and
+    before relying on the filter, since other processes may have written too.
+    """
+
+    def __init__(self, snapshot_path, error_rate=0.01, min_capacity=10000):
+        self.snapshot_path = snapshot_path
+        self.error_rate = error_rate
+        self.min_capacity = min_capacity
+        self.lock = threading.Lock()
+        self.filter = None
+        self.max_rowid = 0           # newest jobs rowid already added
+        self.max_rowid_id = None     # its id, to notice rowids renumbered by VACUUM
+        self.archived_at = ''        # newest tombstone already added
+        self.dirty = False
+
+    def might_contain(self, job_id):
+        return job_id in self.filter
+
+    def rebuild(self, conn):
+        """Build a fresh filter from the whole jobs and archived_ids tables, sized at twice
+        their current row count"""
+        # Take the high-water marks first so rows written during the scan are not skipped later
+        max_rowid, max_rowid_id = conn.execute(
+            "SELECT COALESCE(MAX(rowid), 0), (SELECT id FROM jobs ORDER BY rowid DESC LIMIT 1) FROM jobs").fetchone()
+        archived_at = conn.execute("SELECT COALESCE(MAX(archived_at), '') FROM archived_ids").fetchone()[0]
+        rows = conn.execute("SELECT (SELECT COUNT(*) FROM jobs) + (SELECT COUNT(*) FROM archived_ids)").fetchone()[0]
+
+        bloom = BloomFilter(max(self.min_capacity, 2 * rows), self.error_rate)
+        for (job_id,) in conn.execute("SELECT id FROM jobs"):
+            bloom.add(job_id)
+        for (job_id,) in conn.execute("SELECT id FROM archived_ids"):
+            bloom.add(job_id)
+        with self.lock:
+            self.filter = bloom
+            self.max_rowid, self.max_rowid_id, self.archived_at = max_rowid, max_rowid_id, archived_at
+            self.dirty = True
+
+    def catch_up(self, conn):
+        """Add rows written (by any process) since the filter was last in step with the database"""
+        with self.lock:
+            if self.max_rowid and conn.execute("SELECT id FROM jobs WHERE rowid = ?",
+                                               (self.max_rowid,)).fetchone() != (self.max_rowid_id,):
+                stale = True  # the high-water row is gone or renumbered; rowid ranges can't be trusted
+            else:
+                stale = False
+                rows = conn.execute("SELECT rowid, id FROM jobs WHERE rowid > ? ORDER BY rowid",
+                                    (self.max_rowid,)).fetchall()
+                tombstones = conn.execute("SELECT id, archived_at FROM archived_ids WHERE archived_at > ?",
+                                          (self.archived_at,)).fetchall()
+                for _, job_id in rows:
+                    self.filter.add(job_id)
+                for job_id, archived_at in tombstones:
+                    self.filter.add(job_id)
+                    self.archived_at = max(self.archived_at, archived_at)
+                if rows:
+                    self.max_rowid, self.max_rowid_id = rows[-1]
+                self.dirty = self.dirty or bool(rows or tombstones)
+                stale = self.filter.count > self.filter.capacity  # too full for its error rate
+        if stale:
+            self.rebuild(conn)
+
+    def load(self, conn):
+        """Load the snapshot if there is a usable one, otherwise rebuild; then catch up"""
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                header = json.loads(f.readline())
+                data = f.read()
+            bloom = BloomFilter(header['capacity'], header['error_rate'])
+            if header.get('version') != 1 or len(data) != len(bloom.data) or bloom.hashes != header['hashes']:
+                raise ValueError("snapshot does not match this filter layout")
+            bloom.data = bytearray(data)
+            bloom.count = header['count']
+            with self.lock:
+                self.filter = bloom
+                self.max_rowid, self.max_rowid_id = header['max_rowid'], header['max_rowid_id']
+                self.archived_at = header['archived_at']
+                self.dirty = False
+        except (OSError, ValueError, KeyError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"Ignoring seen-id snapshot: {e}")
+            self.rebuild(conn)
+        self.catch_up(conn)
+        return self
+
+    def save(self):
+        """Write the snapshot atomically, if anything changed since the last save"""
+        with self.lock:
+            if not self.dirty:
+                return
+            header = {'version': 1, 'capacity': self.filter.capacity, 'error_rate': self.filter.error_rate,
+                      'hashes': self.filter.hashes, 'count': self.filter.count,
+                      'max_rowid': self.max_rowid, 'max_rowid_id': self.max_rowid_id,
+                      'archived_at': self.archived_at}
+            data = bytes(self.filter.data)
+            self.dirty = False
+        tmp = self.snapshot_path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(json.dumps(header).encode() + b'\n')
+            f.write(data)
+        os.replace(tmp, self.snapshot_path)
@@ -0,0 +1,150 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import metrics
+from scrapers import SOURCES, fetch_page, NOT_MODIFIED
+
+# Politeness defaults: one request every 2 seconds per host, no bursting
+HOST_RATE = 0.5
+HOST_BURST = 1
+
+# Per-host rate limiting
+class TokenBucket:
+    """Blocking token bucket refilled at `rate` tokens per second"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+def get_bucket(host, rate=HOST_RATE, burst=HOST_BURST):
+    """Return the shared token bucket for a host, creating it on first use"""
+    with _buckets_lock:
+        bucket = _buckets.get(host)
+        if bucket is None or bucket.rate != rate or bucket.capacity != burst:
+            bucket = _buckets[host] = TokenBucket(rate, burst)
+        return bucket
+
+# Adaptive polling
+class AdaptiveInterval:
+    """Polling interval that tightens while a source yields new jobs and backs off
+    while it answers 304s or nothing new, within [minimum, maximum] minutes"""
+
+    def __init__(self, initial, minimum, maximum, tighten=0.5, back_off=1.5):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tighten = tighten
+        self.back_off = back_off
+        self.minutes = min(max(initial, minimum), maximum)
+
+    def update(self, new_jobs, errors=0):
+        """Adjust after a scan; returns the new interval in minutes"""
+        if new_jobs:
+            self.minutes = max(self.minimum, self.minutes * self.tighten)
+        elif not errors:
+            self.minutes = min(self.maximum, self.minutes * self.back_off)
+        return self.minutes
+
+# Concurrent scan
+def _interleave(names):
+    """Order (source, index, url) tasks round-robin so the first wave hits different hosts"""
+    queues = [[(name, i, url) for i, url in enumerate(SOURCES[name]['urls'])] for name in names]
+    tasks = []
+    while any(queues):
+        for queue in queues:
+            if queue:
+                tasks.append(queue.pop(0))
+    return tasks
+
+def _fetch_and_parse(name, url, host_rate, host_burst, is_known):
+    """Fetch one URL under its host's rate limit and parse it with the source's parser"""
+    source = SOURCES[name]
+    get_bucket(urlparse(url).netloc,
+               source.get('host_rate') or host_rate,
+               source.get('host_burst') or host_burst).acquire()
+
+    started = time.monotonic()
+    validators = None
+    try:
+        with metrics.span('fetch', name):
+            content, validators = fetch_page(url, headers=source['headers'])
+        if content is NOT_MODIFIED:
+            jobs = NOT_MODIFIED
+        else:
+            with metrics.span('parse', name):
+                jobs = source['parser'](content, is_known=is_known) if content else []
+        error = None
+    except Exception as e:
+        jobs, error = [], e
+    finished = time.monotonic()
+    return jobs, validators, finished - started, finished, error
+
+def scrape_all(names=None, max_workers=4, host_rate=HOST_RATE, host_burst=HOST_BURST, is_known=None):
+    """Scan sources concurrently on a bounded thread pool.
+
+    `is_known(job_id)` lets parsers drop already-stored jobs and stop early on
+    newest-first feeds.
+
+    Returns {source: {'jobs', 'pages', 'not_modified', 'errors', 'validators', 'fetch_seconds',
+    'seconds'}}, where `seconds` is the wall-clock time from scan start until the source's
+    last page finished, `not_modified` counts pages skipped on a 304 and `validators` are
+    the conditional GET validators to save (http_client.save_validators) once the jobs
+    are ingested.
+    """
+    names = list(names or SOURCES)
+    tasks = _interleave(names)
+    results = {name: {'jobs': [], 'pages': 0, 'not_modified': 0, 'errors': 0, 'validators': [],
+                      'fetch_seconds': 0.0, 'seconds': 0.0}
+               for name in names}
+    pages = {name: [None] * len(SOURCES[name]['urls']) for name in names}
+
+    scan_started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = [(name, i, pool.submit(_fetch_and_parse, name, url, host_rate, host_burst, is_known))
+                   for name, i, url in tasks]
+
+        for name, i, future in futures:
+            result = results[name]
+            jobs, validators, elapsed, finished, error = future.result()
+            if error:
+                print(f"Error fetching {name}: {error}")
+                result['errors'] += 1
+                metrics.inc('job_hunter_http_responses_total', source=name, result='error')
+            elif jobs is NOT_MODIFIED:
+                result['pages'] += 1
+                result['not_modified'] += 1
+                metrics.inc('job_hunter_http_responses_total', source=name, result='not_modified')
+            else:
+                pages[name][i] = jobs
+                result['pages'] += 1
+                if validators:
+                    result['validators'].append(validators)
+                metrics.inc('job_hunter_http_responses_total', source=name, result='ok')
+            result['fetch_seconds'] += elapsed
+            result['seconds'] = max(result['seconds'], finished - scan_started)
+
+    # Keep each source's jobs in feed order regardless of completion order
+    for name in names:
+        results[name]['jobs'] = [job for jobs in pages[name] if jobs for job in jobs]
+
+    return results
@@ -0,0 +1,91 @@
+import threading
+from datetime import datetime
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from storage import get_connection, transaction
+
+# Returned by conditional_get when the server answers 304 Not Modified
+NOT_MODIFIED = object()
+
+class HTTPStatusError(Exception):
+    """Raised by conditional_get for any status other than 200 or 304"""
+
+# Connection pooling
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+def _make_session():
+    """Build a keep-alive session that retries transient failures with backoff"""
+    retry = Retry(
+        total=3,
+        backoff_factor=1,  # 1s, 2s, 4s
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'HEAD']),
+        respect_retry_after_header=True,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=4)
+
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def get_session(url):
+    """Return the pooled session for the URL's host"""
+    host = urlparse(url).netloc
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = _sessions[host] = _make_session()
+        return session
+
+# Conditional GET validators, stored per URL in SQLite
+def _load_validators(url):
+    row = get_connection().execute("SELECT etag, last_modified FROM http_cache WHERE url = ?", (url,)).fetchone()
+    return row or (None, None)
+
+def save_validators(validators):
+    """Store (url, etag, last_modified) entries returned by conditional_get"""
+    if not validators:
+        return
+    now = datetime.now().isoformat()
+    with transaction() as conn:
+        conn.executemany('''INSERT OR REPLACE INTO http_cache (url, etag, last_modified, updated_at)
+                            VALUES (?, ?, ?, ?)''',
+                         [(url, etag, last_modified, now) for url, etag, last_modified in validators])
+
+def conditional_get(url, headers=None, timeout=15):
+    """GET a URL, sending stored ETag/Last-Modified validators.
+
+    Returns (body, validators) on 200 and (NOT_MODIFIED, None) on 304, and raises
+    HTTPStatusError on any other status. `validators` is (url, etag, last_modified), or
+    None if there is nothing to store; the caller saves it with save_validators only
+    once the body is ingested, so a failed ingest is fetched again on the next poll.
+    """
+    request_headers = dict(headers or {})
+    etag, last_modified = _load_validators(url)
+    if etag:
+        request_headers['If-None-Match'] = etag
+    if last_modified:
+        request_headers['If-Modified-Since'] = last_modified
+
+    response = get_session(url).get(url, headers=request_headers, timeout=timeout)
+    if response.status_code == 304:
+        return NOT_MODIFIED, None
+    if response.status_code != 200:
+        raise HTTPStatusError(f"HTTP {response.status_code} from {url}")
+
+    new_etag = response.headers.get('ETag')
+    new_last_modified = response.headers.get('Last-Modified')
+    validators = None
+    if new_etag or new_last_modified or etag or last_modified:
+        validators = (url, new_etag, new_last_modified)
+    return response.content, validators
+
+def post(url, **kwargs):
+    """POST through the pooled session for the URL's host"""
+    return get_session(url).post(url, **kwargs)
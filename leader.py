@@ -0,0 +1,62 @@
+import os
+import socket
+import threading
+import time
+import uuid
+
+from storage import transaction
+
+# Leader election: a named, expiring lease row in SQLite
+class LeaderLease:
+    """Lease that at most one process holds at a time, shared through the jobs database.
+
+    The holder renews it every few seconds; if it stops renewing (crash, restart,
+    deploy) the lease expires after `ttl_seconds` and another process takes over.
+    """
+
+    def __init__(self, name, ttl_seconds=90, holder=None):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.holder = holder or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.expires_at = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take or renew the lease if it is free, expired or already ours; returns True on success.
+
+        One conditional upsert does the check and the write, so two processes racing
+        for an expired lease cannot both win.
+        """
+        now = time.time()
+        expires_at = now + self.ttl_seconds
+        try:
+            with transaction() as conn:
+                cursor = conn.execute('''INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?)
+                                         ON CONFLICT (name) DO UPDATE
+                                         SET holder = excluded.holder, expires_at = excluded.expires_at
+                                         WHERE leases.holder = excluded.holder OR leases.expires_at < ?''',
+                                      (self.name, self.holder, expires_at, now))
+                acquired = cursor.rowcount == 1
+        except Exception as e:
+            print(f"Lease error: {e}")
+            acquired = False
+
+        with self.lock:
+            if acquired:
+                self.expires_at = expires_at
+            return self.expires_at > time.time()
+
+    def release(self):
+        """Give the lease up so another process can take over without waiting for expiry"""
+        with self.lock:
+            self.expires_at = 0.0
+        try:
+            with transaction() as conn:
+                conn.execute("DELETE FROM leases WHERE name = ? AND holder = ?", (self.name, self.holder))
+        except Exception as e:
+            print(f"Lease error: {e}")
+
+    def is_held(self):
+        """True while our last successful acquire has not yet expired"""
+        with self.lock:
+            return self.expires_at > time.time()
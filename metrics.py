@@ -0,0 +1,113 @@
+import threading
+import time
+from contextlib import contextmanager
+
+# Histogram buckets in seconds, from a page parse up to a slow Gemini batch
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# Every metric the app exports: name -> (type, help)
+METRICS = {
+    'job_hunter_stage_seconds': ('histogram', 'Time spent in each pipeline stage, per source'),
+    'job_hunter_llm_request_seconds': ('histogram', 'Gemini request latency'),
+    'job_hunter_db_transaction_seconds': ('histogram', 'Time from BEGIN to COMMIT of SQLite write transactions'),
+    'job_hunter_http_responses_total': ('counter', 'Source page fetches by result (ok, not_modified, error)'),
+    'job_hunter_llm_requests_total': ('counter', 'Gemini requests by outcome'),
+    'job_hunter_analysis_jobs_total': ('counter', 'Analyzed jobs by the tier that settled them'),
+    'job_hunter_jobs_total': ('counter', 'Jobs through the ingest pipeline by outcome'),
+    'job_hunter_scans_total': ('counter', 'Completed scans per source'),
+    'job_hunter_notifications_total': ('counter', 'Outbox deliveries by outcome (sent, retry, gave_up)'),
+    'job_hunter_response_cache_total': ('counter', 'Cached routes served by result (hit, miss, not_modified)'),
+    'job_hunter_seen_filter_total': ('counter', 'Scraped-id lookups by seen-id filter result (new, probable)'),
+    'job_hunter_last_scan_timestamp_seconds': ('gauge', 'Unix time the last scan of a source finished'),
+    'job_hunter_http_not_modified_ratio': ('gauge', 'Share of source page fetches answered with 304'),
+    'job_hunter_analysis_cache_hit_ratio': ('gauge', 'Analysis cache hits over lookups'),
+    'job_hunter_gemini_quota_remaining': ('gauge', 'Gemini requests left in the current window'),
+    'job_hunter_outbox_pending': ('gauge', 'Alerts queued for Telegram delivery'),
+}
+
+_lock = threading.Lock()
+_values = {name: {} for name in METRICS}  # name -> {sorted label items: value}
+
+def _key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+# Recording
+def inc(name, amount=1, **labels):
+    """Add to a counter"""
+    key = _key(labels)
+    with _lock:
+        series = _values[name]
+        series[key] = series.get(key, 0) + amount
+
+def set_gauge(name, value, **labels):
+    """Set a gauge"""
+    with _lock:
+        _values[name][_key(labels)] = value
+
+def observe(name, value, **labels):
+    """Record one histogram observation"""
+    key = _key(labels)
+    with _lock:
+        series = _values[name]
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = {'buckets': [0] * len(BUCKETS), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                histogram['buckets'][i] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+@contextmanager
+def span(stage, source='all'):
+    """Time a pipeline stage (fetch, parse, dedup, analyze, persist, notify, scan, retention)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe('job_hunter_stage_seconds', time.perf_counter() - started, stage=stage, source=source)
+
+def total(name, **labels):
+    """Sum of a counter over every series matching the given labels"""
+    wanted = set(_key(labels))
+    with _lock:
+        return sum(value for key, value in _values[name].items() if wanted <= set(key))
+
+# Prometheus text exposition format
+def _labels(key, extra=()):
+    items = list(key) + list(extra)
+    if not items:
+        return ''
+    escaped = ('%s="%s"' % (k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+               for k, v in items)
+    return '{' + ','.join(escaped) + '}'
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def render():
+    """All metrics in the Prometheus text format"""
+    lines = []
+    with _lock:
+        for name, (kind, help_text) in METRICS.items():
+            series = _values[name]
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted(series.items()):
+                if kind != 'histogram':
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+                    continue
+                for bound, count in zip(BUCKETS, value['buckets']):
+                    lines.append(f"{name}_bucket{_labels(key, [('le', _number(float(bound)))])} {count}")
+                lines.append(f"{name}_bucket{_labels(key, [('le', '+Inf')])} {value['count']}")
+                lines.append(f"{name}_sum{_labels(key)} {_number(value['sum'])}")
+                lines.append(f"{name}_count{_labels(key)} {value['count']}")
+    return '\n'.join(lines) + '\n'
+
+def reset():
+    """Forget every recorded value"""
+    with _lock:
+        for series in _values.values():
+            series.clear()
@@ -0,0 +1,136 @@
+import hashlib
+import random
+import re
+from array import array
+
+from storage import get_connection, transaction
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS  # 4 rows per band: ~50% candidate rate at 0.5 Jaccard, ~98% at 0.8
+PRIME = (1 << 61) - 1
+
+_rng = random.Random(1729)  # fixed seed: signatures must be comparable across restarts
+PERMUTATIONS = [(_rng.randrange(1, PRIME), _rng.randrange(0, PRIME)) for _ in range(NUM_PERM)]
+
+# Shingling
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'big')
+
+def shingles(job):
+    """Word 2-shingles of the normalized title and description (HTML stripped)"""
+    text = f"{job.get('title', '')} {(job.get('description') or '')[:500]}"
+    text = re.sub(r'<[^>]+>', ' ', text).lower()
+    words = re.findall(r'[a-z0-9]+', text)
+    if len(words) < 2:
+        return set(words)
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+def signature(job):
+    """MinHash signature of a job as a tuple of NUM_PERM ints, or None for empty text"""
+    hashed = [_hash64(s) for s in shingles(job)]
+    if not hashed:
+        return None
+    return tuple(min((a * h + b) % PRIME for h in hashed) for a, b in PERMUTATIONS)
+
+def similarity(sig_a, sig_b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+def band_keys(sig):
+    """(band, bucket) pairs for LSH; bucket is a signed 64-bit hash of the band's rows"""
+    keys = []
+    for band in range(BANDS):
+        rows = sig[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(repr(rows).encode(), digest_size=8).digest()
+        keys.append((band, int.from_bytes(digest, 'big', signed=True)))
+    return keys
+
+def pack(sig):
+    return array('Q', sig).tobytes()
+
+def unpack(blob):
+    return tuple(array('Q', blob))
+
+# Persistent LSH index
+def find_duplicate(conn, sig, threshold):
+    """Id of the indexed representative most similar to `sig`, if at least `threshold`"""
+    candidates = set()
+    for band, bucket in band_keys(sig):
+        rows = conn.execute("SELECT job_id FROM lsh_buckets WHERE band = ? AND bucket = ?", (band, bucket))
+        candidates.update(row[0] for row in rows)
+    if not candidates:
+        return None
+
+    best_id, best = None, threshold
+    placeholders = ','.join('?' * len(candidates))
+    rows = conn.execute(f"SELECT job_id, signature FROM job_minhash WHERE job_id IN ({placeholders})",
+                        list(candidates))
+    for job_id, blob in rows:
+        score = similarity(sig, unpack(blob))
+        if score >= best:
+            best_id, best = job_id, score
+    return best_id
+
+def index_signatures(conn, entries):
+    """Add (job_id, signature) pairs to the index; call inside the caller's transaction"""
+    conn.executemany("INSERT OR REPLACE INTO job_minhash (job_id, signature) VALUES (?, ?)",
+                     [(job_id, pack(sig)) for job_id, sig in entries])
+    conn.executemany("INSERT OR IGNORE INTO lsh_buckets (band, bucket, job_id) VALUES (?, ?, ?)",
+                     [(band, bucket, job_id) for job_id, sig in entries for band, bucket in band_keys(sig)])
+
+def remove_signatures(conn, job_ids):
+    """Drop jobs from the index"""
+    params = [(job_id,) for job_id in job_ids]
+    conn.executemany("DELETE FROM lsh_buckets WHERE job_id = ?", params)
+    conn.executemany("DELETE FROM job_minhash WHERE job_id = ?", params)
+
+def backfill_signatures(batch_size=200, should_stop=None):
+    """Index representatives stored before the near-duplicate index existed, a batch per
+    transaction, stopping early when `should_stop()` turns true. Clears the
+    minhash_backfill flag once done; returns the number of jobs indexed."""
+    conn = get_connection()
+    indexed, last_id = 0, ''
+    while not (should_stop and should_stop()):
+        if not conn.execute("SELECT 1 FROM meta WHERE key = 'minhash_backfill'").fetchone():
+            break
+        rows = conn.execute('''SELECT id, title, description FROM jobs
+                               WHERE id > ? AND duplicate_of IS NULL
+                               AND NOT EXISTS (SELECT 1 FROM job_minhash WHERE job_id = jobs.id)
+                               ORDER BY id LIMIT ?''', (last_id, batch_size)).fetchall()
+        if not rows:
+            with transaction() as conn:
+                conn.execute("DELETE FROM meta WHERE key = 'minhash_backfill'")
+            break
+
+        entries = []
+        for job_id, title, description in rows:
+            sig = signature({'title': title, 'description': description})
+            if sig is not None:
+                entries.append((job_id, sig))
+        with transaction() as conn:
+            index_signatures(conn, entries)
+        indexed += len(entries)
+        last_id = rows[-1][0]
+    return indexed
+
+class BatchIndex:
+    """In-memory LSH over the representatives seen earlier in the same ingest batch"""
+
+    def __init__(self):
+        self.buckets = {}
+        self.signatures = {}
+
+    def find(self, sig, threshold):
+        best_id, best = None, threshold
+        candidates = {job_id for key in band_keys(sig) for job_id in self.buckets.get(key, ())}
+        for job_id in candidates:
+            score = similarity(sig, self.signatures[job_id])
+            if score >= best:
+                best_id, best = job_id, score
+        return best_id
+
+    def add(self, job_id, sig):
+        self.signatures[job_id] = sig
+        for key in band_keys(sig):
+            self.buckets.setdefault(key, []).append(job_id)
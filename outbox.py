@@ -0,0 +1,146 @@
+import threading
+import time
+
+import metrics
+from engine import TokenBucket
+from storage import get_connection, transaction, bump_data_version
+
+# Telegram rejects messages longer than this
+MAX_MESSAGE_CHARS = 4096
+
+def enqueue(conn, alerts):
+    """Queue (job_id, message, digest line) alerts; call inside the transaction that saves
+    the jobs, so an alert is queued exactly when its job is stored"""
+    now = time.time()
+    conn.executemany('''INSERT OR IGNORE INTO outbox (job_id, message, summary, created_at, next_attempt_at)
+                        VALUES (?, ?, ?, ?, ?)''',
+                     [(job_id, message, summary, now, now) for job_id, message, summary in alerts])
+
+def pack_digest(summaries, limit=MAX_MESSAGE_CHARS):
+    """Split digest lines into messages under `limit` characters.
+
+    Returns [(text, [indices of the lines it carries])]; an oversized line is cut short.
+    """
+    messages, current = [], []
+
+    def text(indices):
+        header = f"🔥 *{len(indices)} new high-priority jobs*\n\n"
+        return header + "\n\n".join(summaries[i] for i in indices)
+
+    for i, summary in enumerate(summaries):
+        if current and len(text(current + [i])) > limit:
+            messages.append((text(current)[:limit], current))
+            current = []
+        current.append(i)
+    if current:
+        messages.append((text(current)[:limit], current))
+    return messages
+
+# Background delivery
+class Dispatcher:
+    """Delivers queued alerts from the outbox table.
+
+    Messages go out through `send(text) -> bool` no faster than `rate` per second
+    (Telegram allows about one per second per chat). When `digest_threshold` or more
+    new alerts are due at once they are coalesced into digest messages; an alert that
+    has failed before is always retried on its own, so one message Telegram rejects
+    cannot take the alerts coalesced with it down too. A failed delivery
+    is retried after `retry_seconds`, doubling up to `max_retry_seconds`, and given up
+    after `max_attempts`. Delivered jobs are marked notified.
+    """
+
+    def __init__(self, send, rate=1.0, digest_threshold=3, max_attempts=8, retry_seconds=30,
+                 max_retry_seconds=3600, poll_seconds=30, batch_size=50, is_active=None):
+        self.send = send
+        self.bucket = TokenBucket(rate, 1)
+        self.digest_threshold = digest_threshold
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.poll_seconds = poll_seconds
+        self.batch_size = batch_size
+        self.is_active = is_active or (lambda: True)
+        self.wakeup = threading.Event()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def wake(self):
+        """Ask the dispatcher to look at the outbox now instead of at the next poll"""
+        self.wakeup.set()
+
+    def start(self):
+        """Run the dispatcher on a daemon thread"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='outbox-dispatcher', daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while True:
+            self.wakeup.wait(self.poll_seconds)
+            self.wakeup.clear()
+            if not self.is_active():
+                continue
+            try:
+                self.dispatch()
+            except Exception as e:
+                print(f"Outbox error: {e}")
+
+    def _due(self):
+        return get_connection().execute('''SELECT id, job_id, message, summary, attempts FROM outbox
+                                           WHERE status = 'pending' AND next_attempt_at <= ?
+                                           ORDER BY id LIMIT ?''', (time.time(), self.batch_size)).fetchall()
+
+    def dispatch(self):
+        """Send everything that is due; returns the number of alerts delivered"""
+        delivered = 0
+        with self.lock, metrics.span('notify'):
+            while True:
+                rows = self._due()
+                if not rows:
+                    break
+
+                fresh = [row for row in rows if not row[4]]
+                messages = [(row[2], [row]) for row in rows if row[4]]
+                if len(fresh) >= self.digest_threshold:
+                    messages += [(text, [fresh[i] for i in indices])
+                                 for text, indices in pack_digest([row[3] for row in fresh])]
+                else:
+                    messages += [(row[2], [row]) for row in fresh]
+
+                for text, batch in messages:
+                    self.bucket.acquire()
+                    if self.send(text):
+                        self._delivered(batch)
+                        delivered += len(batch)
+                    else:
+                        # The API is failing; stop here and let the backoff space out retries
+                        self._failed(batch)
+                        return delivered
+        return delivered
+
+    def _delivered(self, rows):
+        now = time.time()
+        with transaction() as conn:
+            conn.executemany("UPDATE outbox SET status = 'sent', attempts = attempts + 1, sent_at = ? WHERE id = ?",
+                             [(now, row[0]) for row in rows])
+            conn.executemany("UPDATE jobs SET notified = 1 WHERE id = ?", [(row[1],) for row in rows])
+            bump_data_version(conn)
+        metrics.inc('job_hunter_notifications_total', len(rows), outcome='sent')
+
+    def _failed(self, rows):
+        now = time.time()
+        updates = []
+        for row in rows:
+            tries = row[4] + 1
+            status = 'failed' if tries >= self.max_attempts else 'pending'
+            delay = min(self.retry_seconds * 2 ** (tries - 1), self.max_retry_seconds)
+            updates.append((status, tries, now + delay, row[0]))
+            metrics.inc('job_hunter_notifications_total', outcome='gave_up' if status == 'failed' else 'retry')
+        with transaction() as conn:
+            conn.executemany("UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ? WHERE id = ?",
+                             updates)
+        print(f"Telegram delivery failed for {len(rows)} alert(s)")
+
+    def pending(self):
+        """Number of alerts still waiting to be delivered"""
+        return get_connection().execute("SELECT COUNT(*) FROM outbox WHERE status = 'pending'").fetchone()[0]
@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from storage import get_connection, transaction
+
+class QuotaExhausted(Exception):
+    """Raised when the request budget does not allow another call"""
+
+# Requests-per-minute / requests-per-day governor
+class QuotaGovernor:
+    """Budget for an API with per-minute and per-day limits.
+
+    The minute window is a sliding window in memory. The day's count is kept in the
+    meta table under '<name>_requests:<UTC date>', so it survives restarts and leader
+    hand-offs and is shared by every worker. Defaults match the Gemini 1.5 Flash free
+    tier (15 RPM, 1,500 RPD).
+    """
+
+    def __init__(self, per_minute=15, per_day=1500, max_wait=60, name='gemini'):
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.max_wait = max_wait
+        self.name = name
+        self.minute = deque()
+        self.day_key = None
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+        self.counters = {'granted': 0, 'waited': 0, 'denied': 0, 'rate_limited': 0}
+
+    def _expire(self, now):
+        while self.minute and now - self.minute[0] >= 60:
+            self.minute.popleft()
+
+    def _today(self):
+        return f"{self.name}_requests:{datetime.now(timezone.utc).date().isoformat()}"
+
+    def _reserve_day(self):
+        """Count one request against today's budget in the database; False if it is spent"""
+        key = self._today()
+        with transaction() as conn:
+            if key != self.day_key:
+                # A new day: earlier days' counters are no longer needed
+                conn.execute("DELETE FROM meta WHERE key > ? AND key < ? AND key != ?",
+                             (f"{self.name}_requests:", f"{self.name}_requests;", key))
+                self.day_key = key
+            cursor = conn.execute('''INSERT INTO meta (key, value) VALUES (?, 1)
+                                     ON CONFLICT (key) DO UPDATE SET value = value + 1
+                                     WHERE value < ?''', (key, self.per_day))
+            return cursor.rowcount == 1
+
+    def _used_today(self):
+        row = get_connection().execute("SELECT value FROM meta WHERE key = ?", (self._today(),)).fetchone()
+        return row[0] if row else 0
+
+    def acquire(self):
+        """Reserve one request, waiting up to max_wait seconds for per-minute room.
+
+        Returns False when the daily budget is spent or no slot opens in time.
+        """
+        deadline = time.monotonic() + self.max_wait
+        waited = False
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._expire(now)
+                if now >= self.blocked_until and len(self.minute) < self.per_minute:
+                    if not self._reserve_day():
+                        self.counters['denied'] += 1
+                        return False
+                    self.minute.append(now)
+                    self.counters['granted'] += 1
+                    self.counters['waited'] += waited
+                    return True
+                wait = max(self.blocked_until - now, 60 - (now - self.minute[0]) if self.minute else 0)
+            if now + wait > deadline:
+                with self.lock:
+                    self.counters['denied'] += 1
+                return False
+            waited = True
+            time.sleep(max(wait, 0.05))
+
+    def back_off(self, seconds=60):
+        """Stop granting requests for a while after the server answered 429"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+            self.counters['rate_limited'] += 1
+
+    def remaining(self):
+        """Requests left in the current minute and day windows"""
+        with self.lock:
+            self._expire(time.monotonic())
+            minute = self.per_minute - len(self.minute)
+        return {'minute': minute, 'day': max(0, self.per_day - self._used_today())}
+
+    def stats(self):
+        """Counters plus remaining budget"""
+        with self.lock:
+            counters = dict(self.counters)
+        counters.update({f'remaining_{window}': left for window, left in self.remaining().items()})
+        return counters
+
+def is_rate_limit_error(error):
+    """True for HTTP 429 / ResourceExhausted errors from the API client"""
+    return type(error).__name__ in ('ResourceExhausted', 'TooManyRequests') or '429' in str(error)
@@ -0,0 +1,48 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Rendered-response cache
+class ResponseCache:
+    """Bounded LRU of rendered response bodies, each valid for one data version.
+
+    Entries are keyed by the caller (route, query string, day); an entry stored under
+    an older data version is treated as a miss. `max_bytes` caps the total body size.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=4 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, key, version):
+        """Return (body, mimetype, etag) cached for the key at this version, or None"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self.entries.move_to_end(key)
+            return entry[1:]
+
+    def put(self, key, version, body, mimetype):
+        """Cache a body; returns its strong ETag (a hash of the body)"""
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        if len(body) > self.max_bytes:
+            return etag
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= len(old[1])
+            self.entries[key] = (version, body, mimetype, etag)
+            self.size += len(body)
+            while len(self.entries) > self.max_entries or self.size > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted[1])
+        return etag
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
@@ -0,0 +1,112 @@
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import near_dup
+import storage
+from storage import get_connection, transaction, bump_data_version
+
+# Jobs scored under this count as scams (same threshold as the daily rollups)
+SCAM_SCORE = 40
+
+def archive_dir():
+    """Directory for archived jobs, next to the database"""
+    return os.path.join(os.path.dirname(os.path.abspath(storage.DB_PATH)), 'archive')
+
+def _cutoff(days):
+    return (datetime.now() - timedelta(days=days)).isoformat()
+
+def _remove(conn, job_ids):
+    """Delete jobs with their signatures and alerts, leaving tombstones for dedup;
+    call inside the caller's transaction"""
+    now = datetime.now().isoformat()
+    params = [(job_id,) for job_id in job_ids]
+    conn.executemany("INSERT OR IGNORE INTO archived_ids (id, archived_at) VALUES (?, ?)",
+                     [(job_id, now) for job_id in job_ids])
+    conn.executemany("DELETE FROM jobs WHERE id = ?", params)
+    conn.executemany("DELETE FROM outbox WHERE job_id = ?", params)
+    near_dup.remove_signatures(conn, job_ids)
+    bump_data_version(conn)
+
+# Policies
+def drop_skipped(days, batch_size=500):
+    """Delete skip-priority and scam-scored jobs older than `days`; returns the number removed"""
+    removed = 0
+    while True:
+        ids = [row[0] for row in get_connection().execute(
+            '''SELECT id FROM jobs WHERE created_at < ? AND (priority = 'skip' OR score < ?)
+               LIMIT ?''', (_cutoff(days), SCAM_SCORE, batch_size))]
+        if not ids:
+            return removed
+        with transaction() as conn:
+            _remove(conn, ids)
+        removed += len(ids)
+
+def archive_old(days, directory=None, batch_size=500):
+    """Move jobs older than `days` to gzipped monthly JSONL files (archive/jobs-YYYY-MM.jsonl.gz).
+
+    Rows are appended to the archive before they are deleted, so a crash in between can
+    only archive a row twice, never lose it. Returns the number archived.
+    """
+    directory = directory or archive_dir()
+    archived = 0
+    while True:
+        cursor = get_connection().execute(
+            "SELECT * FROM jobs WHERE created_at < ? ORDER BY created_at LIMIT ?", (_cutoff(days), batch_size))
+        columns = [d[0] for d in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        if not rows:
+            return archived
+
+        months = {}
+        for row in rows:
+            months.setdefault((row['created_at'] or 'unknown')[:7], []).append(row)
+        os.makedirs(directory, exist_ok=True)
+        for month, month_rows in months.items():
+            # Appending adds a gzip member; gzip readers treat the file as one stream
+            with gzip.open(os.path.join(directory, f"jobs-{month}.jsonl.gz"), 'at', encoding='utf-8') as f:
+                for row in month_rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+        with transaction() as conn:
+            _remove(conn, [row['id'] for row in rows])
+        archived += len(rows)
+
+def purge_outbox(days):
+    """Delete delivered and abandoned alerts older than `days`"""
+    with transaction() as conn:
+        return conn.execute("DELETE FROM outbox WHERE status != 'pending' AND created_at < ?",
+                            (time.time() - days * 86400,)).rowcount
+
+# Compaction
+def incremental_vacuum(pages_per_step=256, should_stop=None):
+    """Return free pages to the filesystem in small steps, stopping early when
+    `should_stop()` turns true; returns the number of pages released"""
+    conn = get_connection()
+    released = 0
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        return released  # not switched to incremental yet; the pragma would do nothing
+    while not (should_stop and should_stop()):
+        free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if not free:
+            break
+        conn.execute(f"PRAGMA incremental_vacuum({min(free, pages_per_step)})").fetchall()
+        released += min(free, pages_per_step)
+    return released
+
+def run(skip_days=14, archive_days=90, outbox_days=30, directory=None, should_stop=None):
+    """Apply every retention policy, then compact; returns counts for each step.
+
+    The first run also switches the database to incremental vacuum.
+    """
+    try:
+        storage.enable_incremental_vacuum(get_connection())
+    except Exception as e:
+        print(f"Could not enable incremental vacuum: {e}")
+    counts = {'dropped': drop_skipped(skip_days),
+              'archived': archive_old(archive_days, directory),
+              'outbox_purged': purge_outbox(outbox_days)}
+    counts['pages_released'] = incremental_vacuum(should_stop=should_stop)
+    return counts
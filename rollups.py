@@ -0,0 +1,33 @@
+from datetime import date, timedelta
+
+from storage import get_connection
+
+def _since(days):
+    """First day (YYYY-MM-DD) of a window of `days` days ending today"""
+    return (date.today() - timedelta(days=days)).isoformat()
+
+def totals(days=None):
+    """Job counts from the daily rollups over the last `days` days, or all time.
+
+    Cost is proportional to the number of days/platforms/priorities, not jobs.
+    """
+    query = '''SELECT COALESCE(SUM(total), 0),
+                      COALESCE(SUM(CASE WHEN priority = 'high' THEN total END), 0),
+                      COALESCE(SUM(CASE WHEN priority = 'medium' THEN total END), 0),
+                      COALESCE(SUM(scams), 0)
+               FROM daily_stats'''
+    params = ()
+    if days is not None:
+        query += " WHERE day >= ?"
+        params = (_since(days),)
+
+    total, high, medium, scams = get_connection().execute(query, params).fetchone()
+    return {'total': total, 'high_priority': high, 'medium_priority': medium, 'scams_filtered': scams}
+
+def by_platform(days=7):
+    """Per-platform job and high-priority counts over the last `days` days"""
+    rows = get_connection().execute('''SELECT platform, SUM(total),
+                                              COALESCE(SUM(CASE WHEN priority = 'high' THEN total END), 0)
+                                       FROM daily_stats WHERE day >= ?
+                                       GROUP BY platform ORDER BY platform''', (_since(days),))
+    return {platform: {'total': total, 'high_priority': high} for platform, total, high in rows}
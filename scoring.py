@@ -0,0 +1,185 @@
+import re
+from functools import lru_cache
+
+# Hours used to turn salaries into hourly rates
+HOURS_PER_PERIOD = {
+    'hour': 1, 'hr': 1, 'h': 1,
+    'day': 8,
+    'week': 40, 'wk': 40,
+    'month': 173, 'mo': 173,
+    'year': 2080, 'yr': 2080, 'annum': 2080, 'annual': 2080,
+}
+
+# "$30", "$30.50", "$30-$40", "$30 - 40", "$60k-$80k", optionally followed by "/hr", "per month", ...
+RATE_PATTERN = re.compile(
+    r'\$\s*(\d[\d,]*(?:\.\d+)?)\s*(k\b)?'
+    r'(?:\s*(?:-|–|to)\s*\$?\s*(\d[\d,]*(?:\.\d+)?)\s*(k\b)?)?'
+    r'(?:\s*(?:/|per|an|a)\s*(hour|hr|h|day|week|wk|month|mo|year|yr|annum|annual)\b)?',
+    re.IGNORECASE,
+)
+
+def _amount(number, thousands):
+    value = float(number.replace(',', ''))
+    return value * 1000 if thousands else value
+
+@lru_cache(maxsize=4096)
+def parse_rate(rate_str):
+    """Parse a rate string into (min, max) hourly dollars, or (None, None).
+
+    Salaries are converted to hourly. A "k" on the upper bound only ("$60-80k") applies
+    to both ends, and "k" amounts without a period are yearly. Any other amount without
+    a period ("$300", "$2,500") could be hourly, monthly or a fixed price, so it is
+    left unparsed.
+    """
+    match = RATE_PATTERN.search(rate_str or '')
+    if not match:
+        return None, None
+
+    thousands = match.group(2) or match.group(4)
+    low = _amount(match.group(1), thousands)
+    high = _amount(match.group(3), match.group(4) or match.group(2)) if match.group(3) else low
+
+    period = (match.group(5) or '').lower()
+    if not period:
+        if not thousands:
+            return None, None
+        period = 'year'
+    hours = HOURS_PER_PERIOD[period]
+
+    low, high = sorted((low / hours, high / hours))
+    return round(low, 2), round(high, 2)
+
+def has_explicit_period(rate_str):
+    """True if the rate string says what period it is paid per ("/hr", "per month", ...)"""
+    match = RATE_PATTERN.search(rate_str or '')
+    return bool(match and match.group(5))
+
+# Keyword rules: phrase -> score adjustment, matched in one pass over the title
+TITLE_KEYWORDS = {
+    'discord': 20,
+    'community manager': 20,
+    'web3': 20,
+    'customer support': -15,
+}
+
+TITLE_PATTERN = re.compile(
+    r'\b(?:' + '|'.join(sorted((re.escape(k) for k in TITLE_KEYWORDS), key=len, reverse=True)) + r')\b',
+    re.IGNORECASE,
+)
+
+def title_keywords(title):
+    """Set of TITLE_KEYWORDS phrases present in a title"""
+    return {match.group(0).lower() for match in TITLE_PATTERN.finditer(title or '')}
+
+# Rule-based scorer
+def score_job(job):
+    """Score one job with the local rules (the fallback when Gemini is unavailable)"""
+    score = 50
+    red_flags = []
+
+    # Rate check on the top of the advertised range
+    _, max_rate = parse_rate(job.get('rate', ''))
+    if max_rate is not None:
+        if max_rate >= 30:
+            score += 20
+        elif max_rate >= 25:
+            score += 10
+        elif max_rate <= 10:
+            score -= 30
+            red_flags.append("Very low pay")
+
+    # Title keywords: positive keywords count once, penalties each apply
+    found = title_keywords(job.get('title', ''))
+    if any(TITLE_KEYWORDS[k] > 0 for k in found):
+        score += max(TITLE_KEYWORDS[k] for k in found)
+    score += sum(TITLE_KEYWORDS[k] for k in found if TITLE_KEYWORDS[k] < 0)
+
+    # Client verification
+    if job.get('client_verified'):
+        score += 15
+    else:
+        red_flags.append("No payment verification")
+
+    # Determine priority
+    if score >= 70:
+        priority = "high"
+    elif score >= 50:
+        priority = "medium"
+    else:
+        priority = "skip"
+
+    return {
+        "score": max(0, min(100, score)),
+        "priority": priority,
+        "is_scam": score < 30,
+        "why_match": "Basic scoring applied",
+        "red_flags": red_flags,
+        "job_type": "Unknown"
+    }
+
+def score_jobs(jobs):
+    """Score a whole list of jobs at once"""
+    return [score_job(job) for job in jobs]
+
+# Pre-filter: decide cheaply which jobs need the LLM at all
+PREFILTER_SKIP = 'skip'
+PREFILTER_HIGH = 'high'
+PREFILTER_LLM = 'llm'
+
+def compile_keywords(phrases):
+    """One case-insensitive, word-bounded regex matching any of the phrases"""
+    if not phrases:
+        return None
+    alternatives = sorted((re.escape(p) for p in phrases), key=len, reverse=True)
+    return re.compile(r'\b(?:' + '|'.join(alternatives) + r')\b', re.IGNORECASE)
+
+class PreFilter:
+    """Tiered local triage in front of Gemini.
+
+    Jobs whose title hits the blacklist (and not the whitelist) or whose best
+    advertised rate, stated per hour, month, etc., is under `min_rate` are definitely
+    skipped. Whitelisted, payment-verified jobs paying at least `high_rate` across
+    their whole stated range are definitely high. A rate without a period is only a
+    guess and never decides either way. Everything else is uncertain and goes to
+    the LLM.
+    """
+
+    def __init__(self, min_rate=15, high_rate=25, blacklist=(), whitelist=()):
+        self.min_rate = min_rate
+        self.high_rate = high_rate
+        self.blacklist = compile_keywords(blacklist)
+        self.whitelist = compile_keywords(whitelist)
+
+    def classify(self, job):
+        """Return (decision, reason) for one job"""
+        title = job.get('title', '')
+        min_rate, max_rate = parse_rate(job.get('rate', ''))
+        whitelisted = bool(self.whitelist and self.whitelist.search(title))
+
+        if not whitelisted and self.blacklist:
+            match = self.blacklist.search(title)
+            if match:
+                return PREFILTER_SKIP, f"Blacklisted role: {match.group(0).lower()}"
+        stated = has_explicit_period(job.get('rate', ''))
+        if stated and max_rate is not None and max_rate < self.min_rate:
+            return PREFILTER_SKIP, f"Rate under ${self.min_rate}/hr"
+        if (whitelisted and job.get('client_verified') and stated
+                and min_rate is not None and min_rate >= self.high_rate):
+            return PREFILTER_HIGH, f"Verified target role at ${min_rate:g}+/hr"
+        return PREFILTER_LLM, None
+
+    def analyze(self, job):
+        """Local analysis for a job, or None when it needs the LLM"""
+        decision, reason = self.classify(job)
+        if decision == PREFILTER_LLM:
+            return None
+
+        analysis = score_job(job)
+        analysis['why_match'] = f"Pre-filter: {reason}"
+        if decision == PREFILTER_SKIP:
+            analysis['priority'] = 'skip'
+        else:
+            analysis['priority'] = 'high'
+            analysis['score'] = max(analysis['score'], 70)
+            analysis['is_scam'] = False
+        return analysis
@@ -1,234 +1,324 @@
-import requests
-from bs4 import BeautifulSoup
+import hashlib
+import io
 import re
 from datetime import datetime
-import time
+from urllib.parse import urlsplit, urlunsplit
 
-# Upwork RSS Feed Scraper (Free, no login needed)
-def scrape_upwork():
-    """Scrape Upwork RSS feeds for community manager jobs"""
+from http_client import conditional_get, NOT_MODIFIED
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+# Upwork RSS feed URLs for different keywords
+UPWORK_FEEDS = [
+    "https://www.upwork.com/ab/feed/jobs/rss?q=discord+manager&sort=recency&paging=0%3B10",
+    "https://www.upwork.com/ab/feed/jobs/rss?q=community+manager&sort=recency&paging=0%3B10",
+    "https://www.upwork.com/ab/feed/jobs/rss?q=web3+community&sort=recency&paging=0%3B10",
+]
+
+WWR_URLS = [
+    "https://weworkremotely.com/remote-jobs/search?term=community+manager",
+    "https://weworkremotely.com/remote-jobs/search?term=discord",
+]
+
+CRYPTOJOBS_URLS = [
+    "https://cryptojobslist.com/community-manager",
+    "https://cryptojobslist.com/discord",
+]
+
+# Native posting ids carried in each platform's URLs
+ID_PATTERNS = {
+    'upwork': r'(?:~|%7E)(\w+)',  # /jobs/Some-Title_~01abc.../ or /jobs/~01abc...
+    'wwr': r'/(\d+)-',
+}
+
+def canonical_url(link):
+    """Normalize a posting URL: https, lowercase host without www, no query, fragment or trailing slash"""
+    parts = urlsplit(link.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit(('https', host, path, '', ''))
+
+def stable_job_id(prefix, link):
+    """Deterministic job id for a posting URL.
+
+    Uses the platform's own id when the URL carries one, otherwise the first 16 hex
+    digits of the SHA-1 of the canonical URL, so ids survive process restarts.
+    """
+    pattern = ID_PATTERNS.get(prefix)
+    match = re.search(pattern, link, re.IGNORECASE) if pattern else None
+    if match:
+        return f"{prefix}_{match.group(1).lower()}"
+    return f"{prefix}_{hashlib.sha1(canonical_url(link).encode()).hexdigest()[:16]}"
+
+# Fetch a single page
+def fetch_page(url, headers=None):
+    """Fetch a page, returning (body or NOT_MODIFIED, validators to save once it is ingested);
+    raises HTTPStatusError on an error status"""
+    return conditional_get(url, headers=headers, timeout=15)
+
+# Streaming helpers: items are parsed one at a time and parsing stops as soon as
+# the caller has enough, instead of building a tree of the whole page first
+def _iter_elements(content, tags, html=False):
+    """Yield each completed element with one of the given tags; a page too broken to
+    recover ends the stream instead of raising"""
+    from lxml import etree  # imported on first parse to keep web startup light
+
+    try:
+        for _, elem in etree.iterparse(io.BytesIO(content), events=('end',), tag=tags,
+                                       html=html, recover=True, no_network=True):
+            yield elem
+    except etree.XMLSyntaxError as e:
+        print(f"Stopped parsing malformed page: {e}")
+
+def _has_class(elem, cls):
+    return cls in (elem.get('class') or '').split()
+
+def _find(elem, tag, cls=None):
+    """First descendant with the tag (and class, if given), or None"""
+    for child in elem.iter(tag):
+        if child is not elem and (cls is None or _has_class(child, cls)):
+            return child
+    return None
+
+def _text(elem):
+    return ''.join(elem.itertext()) if elem is not None else ''
+
+def collect(items, limit, is_known=None, stop_at_known=False):
+    """Take up to `limit` items from a parse generator.
+
+    Items whose id `is_known` reports as already stored are dropped; for feeds sorted
+    newest-first (`stop_at_known`) the first known id ends the scan, since everything
+    after it is older.
+    """
     jobs = []
-    
-    # Upwork RSS feed URLs for different keywords
-    feeds = [
-        "https://www.upwork.com/ab/feed/jobs/rss?q=discord+manager&sort=recency&paging=0%3B10",
-        "https://www.upwork.com/ab/feed/jobs/rss?q=community+manager&sort=recency&paging=0%3B10",
-        "https://www.upwork.com/ab/feed/jobs/rss?q=web3+community&sort=recency&paging=0%3B10",
-    ]
-    
-    for feed_url in feeds:
+    for examined, job in enumerate(items, 1):
+        if is_known and is_known(job['id']):
+            if stop_at_known:
+                break
+        else:
+            jobs.append(job)
+        if examined >= limit:
+            break
+    return jobs
+
+# Upwork RSS Feed Parser (Free, no login needed)
+def iter_upwork(content):
+    """Yield job dicts from an Upwork RSS feed as each <item> is parsed"""
+    for item in _iter_elements(content, 'item'):
         try:
-            response = requests.get(feed_url, timeout=15)
-            if response.status_code != 200:
-                continue
-            
-            soup = BeautifulSoup(response.content, 'xml')
-            items = soup.find_all('item')
-            
-            for item in items[:5]:  # Limit to 5 per feed
-                try:
-                    title = item.find('title').text
-                    link = item.find('link').text
-                    description = item.find('description').text if item.find('description') else ""
-                    pub_date = item.find('pubDate').text if item.find('pubDate') else "Unknown"
-                    
-                    # Extract job ID from link
-                    job_id_match = re.search(r'/jobs/[~]?(\w+)', link)
-                    job_id = f"upwork_{job_id_match.group(1)}" if job_id_match else f"upwork_{hash(link) % 1000000}"
-                    
-                    # Try to extract rate from description
-                    rate = "Not specified"
-                    rate_match = re.search(r'\$(\d+)\.?\d*\s*-?\s*\$?(\d+)?\.?\d*/hr', description)
-                    if rate_match:
-                        rate = f"${rate_match.group(1)}-${rate_match.group(2) if rate_match.group(2) else rate_match.group(1)}/hr"
-                    
-                    # Check for payment verification (Upwork RSS sometimes includes this)
-                    client_verified = "payment verified" in description.lower()
-                    
-                    jobs.append({
-                        'id': job_id,
-                        'title': title,
-                        'platform': 'Upwork',
-                        'url': link,
-                        'description': description[:500],
-                        'rate': rate,
-                        'client_verified': client_verified,
-                        'client_spent': 'Unknown',
-                        'proposals': 0,
-                        'posted_date': pub_date
-                    })
-                except Exception as e:
-                    print(f"Error parsing Upwork item: {e}")
-                    continue
-            
-            time.sleep(2)  # Be polite
-            
+            title = item.findtext('title')
+            link = item.findtext('link')
+            description = item.findtext('description') or ""
+            pub_date = item.findtext('pubDate') or "Unknown"
+            if title is None or link is None:
+                raise ValueError("item without title or link")
+
+            job_id = stable_job_id('upwork', link)
+
+            # Try to extract rate from description
+            rate = "Not specified"
+            rate_match = re.search(r'\$(\d+)\.?\d*\s*-?\s*\$?(\d+)?\.?\d*/hr', description)
+            if rate_match:
+                rate = f"${rate_match.group(1)}-${rate_match.group(2) if rate_match.group(2) else rate_match.group(1)}/hr"
+
+            # Check for payment verification (Upwork RSS sometimes includes this)
+            client_verified = "payment verified" in description.lower()
+
+            job = {
+                'id': job_id,
+                'title': title,
+                'platform': 'Upwork',
+                'url': link,
+                'description': description[:500],
+                'rate': rate,
+                'client_verified': client_verified,
+                'client_spent': 'Unknown',
+                'proposals': 0,
+                'posted_date': pub_date
+            }
         except Exception as e:
-            print(f"Error fetching Upwork feed: {e}")
+            print(f"Error parsing Upwork item: {e}")
             continue
-    
-    print(f"Found {len(jobs)} jobs from Upwork")
-    return jobs
+        finally:
+            item.clear()
+        yield job
 
-# We Work Remotely Scraper
-def scrape_weworkremotely():
-    """Scrape We Work Remotely for community manager jobs"""
-    jobs = []
-    
-    categories = [
-        "https://weworkremotely.com/remote-jobs/search?term=community+manager",
-        "https://weworkremotely.com/remote-jobs/search?term=discord",
-    ]
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
-    
-    for url in categories:
+def parse_upwork(content, is_known=None):
+    """Parse one Upwork RSS feed into job dicts"""
+    return collect(iter_upwork(content), 5, is_known, stop_at_known=True)  # Limit to 5 per feed
+
+# We Work Remotely Parser
+def iter_weworkremotely(content):
+    """Yield job dicts from a We Work Remotely search page as each listing is parsed"""
+    for listing in _iter_elements(content, 'li', html=True):
+        if not _has_class(listing, 'feature'):
+            continue
         try:
-            response = requests.get(url, headers=headers, timeout=15)
-            if response.status_code != 200:
+            title_elem = _find(listing, 'span', 'title')
+            if title_elem is None:
                 continue
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            job_listings = soup.find_all('li', class_='feature')[:10]  # Limit to 10
-            
-            for listing in job_listings:
-                try:
-                    title_elem = listing.find('span', class_='title')
-                    if not title_elem:
-                        continue
-                    
-                    title = title_elem.text.strip()
-                    
-                    link_elem = listing.find('a')
-                    if not link_elem:
-                        continue
-                    
-                    link = "https://weworkremotely.com" + link_elem['href']
-                    
-                    company_elem = listing.find('span', class_='company')
-                    company = company_elem.text.strip() if company_elem else "Unknown"
-                    
-                    # Extract job ID from URL
-                    job_id_match = re.search(r'/(\d+)-', link)
-                    job_id = f"wwr_{job_id_match.group(1)}" if job_id_match else f"wwr_{hash(link) % 1000000}"
-                    
-                    jobs.append({
-                        'id': job_id,
-                        'title': title,
-                        'platform': 'We Work Remotely',
-                        'url': link,
-                        'description': f"{title} at {company}",
-                        'rate': 'See job posting',
-                        'client_verified': True,  # WWR vets companies
-                        'client_spent': 'N/A',
-                        'proposals': 0,
-                        'posted_date': datetime.now().strftime('%Y-%m-%d')
-                    })
-                except Exception as e:
-                    print(f"Error parsing WWR listing: {e}")
-                    continue
-            
-            time.sleep(2)
-            
+
+            title = _text(title_elem).strip()
+
+            link_elem = _find(listing, 'a')
+            if link_elem is None or not link_elem.get('href'):
+                continue
+
+            link = "https://weworkremotely.com" + link_elem.get('href')
+
+            company_elem = _find(listing, 'span', 'company')
+            company = _text(company_elem).strip() if company_elem is not None else "Unknown"
+
+            job = {
+                'id': stable_job_id('wwr', link),
+                'title': title,
+                'platform': 'We Work Remotely',
+                'url': link,
+                'description': f"{title} at {company}",
+                'rate': 'See job posting',
+                'client_verified': True,  # WWR vets companies
+                'client_spent': 'N/A',
+                'proposals': 0,
+                'posted_date': datetime.now().strftime('%Y-%m-%d')
+            }
         except Exception as e:
-            print(f"Error fetching WWR: {e}")
+            print(f"Error parsing WWR listing: {e}")
             continue
-    
-    print(f"Found {len(jobs)} jobs from We Work Remotely")
-    return jobs
+        finally:
+            listing.clear()
+        yield job
 
-# CryptoJobsList Scraper  
-def scrape_cryptojobs():
-    """Scrape CryptoJobsList for Web3 community manager jobs"""
-    jobs = []
-    
-    urls = [
-        "https://cryptojobslist.com/community-manager",
-        "https://cryptojobslist.com/discord",
-    ]
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
-    
-    for url in urls:
+def parse_weworkremotely(content, is_known=None):
+    """Parse one We Work Remotely search page into job dicts"""
+    return collect(iter_weworkremotely(content), 10, is_known)  # Limit to 10
+
+# CryptoJobsList Parser
+def iter_cryptojobs(content):
+    """Yield job dicts from a CryptoJobsList page as each job card is parsed"""
+    for card in _iter_elements(content, 'div', html=True):
+        if not _has_class(card, 'job-list-item'):
+            continue
         try:
-            response = requests.get(url, headers=headers, timeout=15)
-            if response.status_code != 200:
+            title_elem = _find(card, 'h2')
+            if title_elem is None:
+                title_elem = _find(card, 'h3')
+            if title_elem is None:
                 continue
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            job_cards = soup.find_all('div', class_='job-list-item')[:10]
-            
-            for card in job_cards:
-                try:
-                    title_elem = card.find('h2') or card.find('h3')
-                    if not title_elem:
-                        continue
-                    
-                    title = title_elem.text.strip()
-                    
-                    link_elem = card.find('a', href=True)
-                    if not link_elem:
-                        continue
-                    
-                    link = link_elem['href']
-                    if not link.startswith('http'):
-                        link = "https://cryptojobslist.com" + link
-                    
-                    # Extract company
-                    company_elem = card.find('span', class_='company-name') or card.find('div', class_='company')
-                    company = company_elem.text.strip() if company_elem else "Unknown"
-                    
-                    # Extract salary if available
-                    salary_elem = card.find('span', class_='salary')
-                    rate = salary_elem.text.strip() if salary_elem else "See posting"
-                    
-                    job_id = f"crypto_{hash(link) % 1000000}"
-                    
-                    jobs.append({
-                        'id': job_id,
-                        'title': title,
-                        'platform': 'CryptoJobsList',
-                        'url': link,
-                        'description': f"{title} at {company}",
-                        'rate': rate,
-                        'client_verified': True,  # CryptoJobsList vets postings
-                        'client_spent': 'N/A',
-                        'proposals': 0,
-                        'posted_date': datetime.now().strftime('%Y-%m-%d')
-                    })
-                except Exception as e:
-                    print(f"Error parsing CryptoJobs card: {e}")
-                    continue
-            
-            time.sleep(2)
-            
+
+            title = _text(title_elem).strip()
+
+            link_elem = next((a for a in card.iter('a') if a.get('href')), None)
+            if link_elem is None:
+                continue
+
+            link = link_elem.get('href')
+            if not link.startswith('http'):
+                link = "https://cryptojobslist.com" + link
+
+            # Extract company
+            company_elem = _find(card, 'span', 'company-name')
+            if company_elem is None:
+                company_elem = _find(card, 'div', 'company')
+            company = _text(company_elem).strip() if company_elem is not None else "Unknown"
+
+            # Extract salary if available
+            salary_elem = _find(card, 'span', 'salary')
+            rate = _text(salary_elem).strip() if salary_elem is not None else "See posting"
+
+            job = {
+                'id': stable_job_id('crypto', link),
+                'title': title,
+                'platform': 'CryptoJobsList',
+                'url': link,
+                'description': f"{title} at {company}",
+                'rate': rate,
+                'client_verified': True,  # CryptoJobsList vets postings
+                'client_spent': 'N/A',
+                'proposals': 0,
+                'posted_date': datetime.now().strftime('%Y-%m-%d')
+            }
         except Exception as e:
-            print(f"Error fetching CryptoJobs: {e}")
+            print(f"Error parsing CryptoJobs card: {e}")
             continue
-    
-    print(f"Found {len(jobs)} jobs from CryptoJobsList")
+        finally:
+            card.clear()
+        yield job
+
+def parse_cryptojobs(content, is_known=None):
+    """Parse one CryptoJobsList page into job dicts"""
+    return collect(iter_cryptojobs(content), 10, is_known)
+
+# Source plugin registry: every source the engine knows how to scan
+SOURCES = {}
+
+def register_source(name, urls, parser, headers=None, host_rate=None, host_burst=None,
+                    interval_minutes=30, min_interval_minutes=10, max_interval_minutes=180):
+    """Register a source plugin.
+
+    `parser(content, is_known=None)` turns one fetched page into job dicts.
+    `host_rate`/`host_burst` override the engine's per-host politeness limits, and the
+    interval settings bound the adaptive polling schedule for the source.
+    """
+    SOURCES[name] = {
+        'urls': list(urls),
+        'headers': headers,
+        'parser': parser,
+        'host_rate': host_rate,
+        'host_burst': host_burst,
+        'interval_minutes': interval_minutes,
+        'min_interval_minutes': min_interval_minutes,
+        'max_interval_minutes': max_interval_minutes,
+    }
+    return SOURCES[name]
+
+# Upwork feeds are the highest-yield source, so they may be polled every few minutes
+register_source('Upwork', UPWORK_FEEDS, parse_upwork,
+                interval_minutes=10, min_interval_minutes=3, max_interval_minutes=60)
+register_source('We Work Remotely', WWR_URLS, parse_weworkremotely, headers=HEADERS,
+                interval_minutes=30, min_interval_minutes=15, max_interval_minutes=240)
+register_source('CryptoJobsList', CRYPTOJOBS_URLS, parse_cryptojobs, headers=HEADERS,
+                interval_minutes=30, min_interval_minutes=15, max_interval_minutes=240)
+
+def scrape_source(name):
+    """Scan a single source through the scraping engine"""
+    from engine import scrape_all
+
+    jobs = scrape_all([name])[name]['jobs']
+    print(f"Found {len(jobs)} jobs from {name}")
     return jobs
 
+def scrape_upwork():
+    """Scrape Upwork RSS feeds for community manager jobs"""
+    return scrape_source('Upwork')
+
+def scrape_weworkremotely():
+    """Scrape We Work Remotely for community manager jobs"""
+    return scrape_source('We Work Remotely')
+
+def scrape_cryptojobs():
+    """Scrape CryptoJobsList for Web3 community manager jobs"""
+    return scrape_source('CryptoJobsList')
+
 # Test function
 if __name__ == "__main__":
     print("Testing scrapers...")
-    
+
     print("\n1. Testing Upwork...")
     upwork = scrape_upwork()
     if upwork:
         print(f"✅ Found {len(upwork)} jobs")
         print(f"Example: {upwork[0]['title']}")
-    
+
     print("\n2. Testing We Work Remotely...")
     wwr = scrape_weworkremotely()
     if wwr:
         print(f"✅ Found {len(wwr)} jobs")
         print(f"Example: {wwr[0]['title']}")
-    
+
     print("\n3. Testing CryptoJobsList...")
     crypto = scrape_cryptojobs()
     if crypto:
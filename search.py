@@ -0,0 +1,36 @@
+import re
+
+from storage import get_connection
+
+# bm25 weights for (title, description, why_match): title hits count most
+BM25_WEIGHTS = (10.0, 1.0, 2.0)
+
+def fts_query(text, mode='all'):
+    """Build a safe FTS5 MATCH expression from free text.
+
+    Every word is quoted so FTS operators in user input are treated as plain terms;
+    mode 'all' requires every word, 'any' matches at least one.
+    """
+    words = re.findall(r'\w+', text or '')
+    if not words:
+        return None
+    joiner = ' OR ' if mode == 'any' else ' '
+    return joiner.join(f'"{word}"' for word in words)
+
+def search_jobs(text, mode='all', limit=20):
+    """Rank jobs matching `text` by bm25, best first, each with a highlighted snippet"""
+    query = fts_query(text, mode)
+    if query is None:
+        return []
+
+    rows = get_connection().execute(f'''
+        SELECT j.id, j.title, j.platform, j.url, j.rate, j.score, j.priority, j.created_at,
+               bm25(jobs_fts, {', '.join(map(str, BM25_WEIGHTS))}) AS rank,
+               snippet(jobs_fts, -1, '<b>', '</b>', '…', 16)
+        FROM jobs_fts JOIN jobs j ON j.rowid = jobs_fts.rowid
+        WHERE jobs_fts MATCH ?
+        ORDER BY rank
+        LIMIT ?''', (query, limit))
+
+    columns = ['id', 'title', 'platform', 'url', 'rate', 'score', 'priority', 'created_at', 'rank', 'snippet']
+    return [dict(zip(columns, row)) for row in rows]
@@ -0,0 +1,347 @@
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+DB_PATH = os.environ.get('JOBS_DB_PATH', 'jobs.db')
+
+# Applied to every new connection
+PRAGMAS = [
+    "PRAGMA auto_vacuum = INCREMENTAL",  # only takes effect on a new file; retention switches old ones
+    "PRAGMA journal_mode = WAL",      # readers never block the scan thread's writes
+    "PRAGMA synchronous = NORMAL",    # safe with WAL, one fsync per checkpoint instead of per commit
+    "PRAGMA busy_timeout = 5000",     # wait for a competing writer instead of 'database is locked'
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -8000",      # 8 MB page cache
+    "PRAGMA foreign_keys = ON",
+]
+
+# Connection handling: one connection per thread, reused for its lifetime
+_local = threading.local()
+
+def get_connection():
+    """Return this thread's connection to the jobs database, opening it on first use"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None or getattr(_local, 'path', None) != DB_PATH:
+        conn = sqlite3.connect(DB_PATH, timeout=5)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        _local.conn, _local.path = conn, DB_PATH
+    return conn
+
+@contextmanager
+def transaction():
+    """Yield this thread's connection inside a transaction, committing on success"""
+    conn = get_connection()
+    started = time.perf_counter()
+    with conn:
+        yield conn
+    metrics.observe('job_hunter_db_transaction_seconds', time.perf_counter() - started)
+
+def close_connection():
+    """Close this thread's connection, if any"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+# Schema
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS jobs
+       (id TEXT PRIMARY KEY,
+        title TEXT,
+        platform TEXT,
+        url TEXT,
+        description TEXT,
+        rate TEXT,
+        client_verified INTEGER,
+        client_spent TEXT,
+        proposals INTEGER,
+        posted_date TEXT,
+        score INTEGER,
+        priority TEXT,
+        red_flags TEXT,
+        why_match TEXT,
+        notified INTEGER DEFAULT 0,
+        created_at TEXT)''',
+
+    # Conditional GET validators for scraped feeds and pages
+    '''CREATE TABLE IF NOT EXISTS http_cache
+       (url TEXT PRIMARY KEY,
+        etag TEXT,
+        last_modified TEXT,
+        updated_at TEXT)''',
+
+    # Gemini analyses keyed by a hash of the job content and prompt version
+    '''CREATE TABLE IF NOT EXISTS analysis_cache
+       (key TEXT PRIMARY KEY,
+        analysis TEXT,
+        created_at REAL,
+        last_used REAL)''',
+
+    # Expiring leases; the 'scanner' lease picks the one process that runs scheduled scans
+    '''CREATE TABLE IF NOT EXISTS leases
+       (name TEXT PRIMARY KEY,
+        holder TEXT NOT NULL,
+        expires_at REAL NOT NULL)''',
+
+    # Telegram alerts waiting for (or done with) delivery by the outbox dispatcher
+    '''CREATE TABLE IF NOT EXISTS outbox
+       (id INTEGER PRIMARY KEY,
+        job_id TEXT UNIQUE NOT NULL,
+        message TEXT NOT NULL,
+        summary TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        next_attempt_at REAL NOT NULL,
+        created_at REAL NOT NULL,
+        sent_at REAL)''',
+    "CREATE INDEX IF NOT EXISTS idx_outbox_due ON outbox (status, next_attempt_at)",
+
+    # Small named counters; data_version is bumped by every commit that changes what
+    # the dashboard and API show, and invalidates cached responses
+    '''CREATE TABLE IF NOT EXISTS meta
+       (key TEXT PRIMARY KEY,
+        value INTEGER NOT NULL) WITHOUT ROWID''',
+    "INSERT OR IGNORE INTO meta (key, value) VALUES ('data_version', 0)",
+
+    # When the last scan of each kind ('full', 'any') finished and how, shared by every
+    # worker so /health reports the same readiness whichever one answers
+    '''CREATE TABLE IF NOT EXISTS scans
+       (kind TEXT PRIMARY KEY,
+        finished_at TEXT NOT NULL,
+        error TEXT) WITHOUT ROWID''',
+
+    # Tombstones for jobs removed by retention, so dedup still recognizes them
+    '''CREATE TABLE IF NOT EXISTS archived_ids
+       (id TEXT PRIMARY KEY,
+        archived_at TEXT NOT NULL) WITHOUT ROWID''',
+]
+
+def data_version():
+    """Current data version, shared by every worker through the database"""
+    return get_connection().execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()[0]
+
+def bump_data_version(conn):
+    """Mark job data as changed; call inside the transaction that changes it"""
+    conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'data_version'")
+
+# Migrations, applied in order and tracked in PRAGMA user_version
+def migrate_stable_ids(conn):
+    """Flag existing jobs for the stable_job_id rewrite; rewrite_stable_ids does the work
+    later on the scanning worker, so startup stays fast"""
+    conn.execute("INSERT OR IGNORE INTO meta (key, value) SELECT 'stable_ids_rewrite', 1 WHERE EXISTS (SELECT 1 FROM jobs)")
+
+def rewrite_stable_ids(batch_size=500):
+    """Rewrite every job id with stable_job_id and merge rows that collapse onto the
+    same id, keeping the oldest row and carrying over its notified flag.
+
+    Runs in batches of `batch_size` ids per transaction: first every row is parked
+    under 'migrating:<new id>' (duplicates deleted), then the parked ids are renamed,
+    so renames cannot collide and an interrupted run resumes where it stopped. Returns
+    the number of duplicate rows merged, or None if there was nothing to rewrite.
+    """
+    from scrapers import stable_job_id
+
+    conn = get_connection()
+    if not conn.execute("SELECT 1 FROM meta WHERE key = 'stable_ids_rewrite'").fetchone():
+        return None
+
+    rows = conn.execute("SELECT id, url, notified FROM jobs ORDER BY created_at, id").fetchall()
+    groups = {}
+    for job_id, url, notified in rows:
+        if job_id.startswith('migrating:'):
+            new_id = job_id[len('migrating:'):]  # parked by an interrupted run
+        else:
+            new_id = stable_job_id(job_id.split('_', 1)[0], url or job_id)
+        groups.setdefault(new_id, []).append((job_id, notified))
+
+    merged = 0
+    items = list(groups.items())
+    for i in range(0, len(items), batch_size):
+        with transaction() as conn:
+            for new_id, group in items[i:i + batch_size]:
+                keeper_id = group[0][0]
+                duplicates = [(job_id,) for job_id, _ in group[1:]]
+                conn.executemany("DELETE FROM jobs WHERE id = ?", duplicates)
+                merged += len(duplicates)
+
+                notified = max(flag or 0 for _, flag in group)
+                conn.execute("UPDATE jobs SET id = ?, notified = ? WHERE id = ?",
+                             ('migrating:' + new_id, notified, keeper_id))
+
+    while True:
+        with transaction() as conn:
+            parked = conn.execute("SELECT id FROM jobs WHERE id LIKE 'migrating:%' LIMIT ?",
+                                  (batch_size,)).fetchall()
+            conn.executemany("UPDATE jobs SET id = substr(id, 11) WHERE id = ?", parked)
+            if not parked:
+                conn.execute("DELETE FROM meta WHERE key = 'stable_ids_rewrite'")
+                bump_data_version(conn)
+                break
+    print(f"Migrated job ids to stable form ({merged} duplicate rows merged)")
+    return merged
+
+def add_job_indexes(conn):
+    """Covering indexes for the dashboard and API filters on date, priority and score"""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created ON jobs (created_at, priority, score)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_priority_created ON jobs (priority, created_at, score)")
+
+def add_daily_rollups(conn):
+    """Per-day, per-platform, per-priority counters kept current by an insert trigger.
+
+    Replaces the never-written stats table and backfills from existing jobs.
+    """
+    conn.execute("DROP TABLE IF EXISTS stats")
+    conn.execute('''CREATE TABLE IF NOT EXISTS daily_stats
+                    (day TEXT NOT NULL,
+                     platform TEXT NOT NULL,
+                     priority TEXT NOT NULL,
+                     total INTEGER NOT NULL DEFAULT 0,
+                     scams INTEGER NOT NULL DEFAULT 0,
+                     PRIMARY KEY (day, platform, priority)) WITHOUT ROWID''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS jobs_rollup_insert AFTER INSERT ON jobs
+                    BEGIN
+                        INSERT INTO daily_stats (day, platform, priority, total, scams)
+                        VALUES (substr(NEW.created_at, 1, 10), COALESCE(NEW.platform, ''),
+                                COALESCE(NEW.priority, ''), 1, COALESCE(NEW.score < 40, 0))
+                        ON CONFLICT (day, platform, priority) DO UPDATE
+                        SET total = total + 1, scams = scams + excluded.scams;
+                    END''')
+    conn.execute("DELETE FROM daily_stats")
+    conn.execute('''INSERT INTO daily_stats (day, platform, priority, total, scams)
+                    SELECT substr(created_at, 1, 10), COALESCE(platform, ''), COALESCE(priority, ''),
+                           COUNT(*), COALESCE(SUM(score < 40), 0)
+                    FROM jobs GROUP BY 1, 2, 3''')
+
+def add_keyset_indexes(conn):
+    """Rebuild the date indexes with id as a tie-breaker for (created_at, id) keyset paging"""
+    conn.execute("DROP INDEX IF EXISTS idx_jobs_created")
+    conn.execute("DROP INDEX IF EXISTS idx_jobs_priority_created")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_created_id ON jobs (created_at, id, priority, score)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_priority_created_id ON jobs (priority, created_at, id, score)")
+
+def add_full_text_index(conn):
+    """FTS5 index over title, description and why_match, kept in sync by triggers"""
+    conn.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5
+                    (title, description, why_match,
+                     content='jobs', content_rowid='rowid', tokenize='porter unicode61')''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs
+                    BEGIN
+                        INSERT INTO jobs_fts (rowid, title, description, why_match)
+                        VALUES (NEW.rowid, NEW.title, NEW.description, NEW.why_match);
+                    END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs
+                    BEGIN
+                        INSERT INTO jobs_fts (jobs_fts, rowid, title, description, why_match)
+                        VALUES ('delete', OLD.rowid, OLD.title, OLD.description, OLD.why_match);
+                    END''')
+    conn.execute('''CREATE TRIGGER IF NOT EXISTS jobs_fts_update AFTER UPDATE OF title, description, why_match ON jobs
+                    BEGIN
+                        INSERT INTO jobs_fts (jobs_fts, rowid, title, description, why_match)
+                        VALUES ('delete', OLD.rowid, OLD.title, OLD.description, OLD.why_match);
+                        INSERT INTO jobs_fts (rowid, title, description, why_match)
+                        VALUES (NEW.rowid, NEW.title, NEW.description, NEW.why_match);
+                    END''')
+    rebuild_full_text_index(conn)
+
+def rebuild_full_text_index(conn):
+    """Re-read every job into the FTS index (needed after anything that renumbers rowids, like VACUUM)"""
+    conn.execute("INSERT INTO jobs_fts (jobs_fts) VALUES ('rebuild')")
+
+def add_near_duplicate_index(conn):
+    """MinHash signatures and LSH band buckets for cross-posting detection, plus
+    jobs.duplicate_of linking a near-duplicate to its cluster representative.
+
+    Existing jobs are indexed later by near_dup.backfill_signatures, flagged here
+    through meta, so the migration stays fast at startup.
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(jobs)")]
+    if 'duplicate_of' not in columns:
+        conn.execute("ALTER TABLE jobs ADD COLUMN duplicate_of TEXT")
+    conn.execute('''CREATE TABLE IF NOT EXISTS job_minhash
+                    (job_id TEXT PRIMARY KEY,
+                     signature BLOB NOT NULL)''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS lsh_buckets
+                    (band INTEGER NOT NULL,
+                     bucket INTEGER NOT NULL,
+                     job_id TEXT NOT NULL,
+                     PRIMARY KEY (band, bucket, job_id)) WITHOUT ROWID''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_lsh_buckets_job ON lsh_buckets (job_id)")
+    conn.execute("INSERT OR IGNORE INTO meta (key, value) SELECT 'minhash_backfill', 1 WHERE EXISTS (SELECT 1 FROM jobs)")
+
+MIGRATIONS = [
+    (1, migrate_stable_ids),
+    (2, add_job_indexes),
+    (3, add_daily_rollups),
+    (4, add_keyset_indexes),
+    (5, add_full_text_index),
+    (6, add_near_duplicate_index),
+]
+
+def begin_immediate(conn):
+    """BEGIN IMMEDIATE, waiting as long as another process holds the write lock (a long
+    migration in a worker that started first) instead of giving up at busy_timeout"""
+    waiting = False
+    while True:
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            return
+        except sqlite3.OperationalError as e:
+            if 'locked' not in str(e) and 'busy' not in str(e):
+                raise
+            if not waiting:
+                print("Waiting for another worker to release the database write lock...")
+                waiting = True
+
+def migrate(conn):
+    """Apply every migration newer than the database's user_version, each in its own transaction.
+
+    Each step takes the write lock with BEGIN IMMEDIATE and re-reads user_version
+    under it, so a step that fails leaves no trace (sqlite3 would otherwise commit
+    DDL as it goes) and workers starting together never apply the same step twice:
+    the later one waits for the lock, then finds the step already done.
+    """
+    for target, step in MIGRATIONS:
+        if conn.execute("PRAGMA user_version").fetchone()[0] >= target:
+            continue
+        begin_immediate(conn)
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < target:
+                step(conn)
+                conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+def enable_incremental_vacuum(conn):
+    """Switch the database to auto_vacuum=INCREMENTAL so retention can hand freed pages
+    back to the filesystem a few at a time. Takes effect through a one-off VACUUM, which
+    needs about the database's size again in free disk, so retention runs it on the
+    scanning worker rather than every worker doing it at startup."""
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+        return
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    conn.execute("VACUUM")
+    # VACUUM may renumber the implicit rowids the FTS index points at
+    with conn:
+        rebuild_full_text_index(conn)
+    print("Enabled incremental vacuum")
+
+def init_db():
+    """Create tables and bring the schema up to date"""
+    conn = get_connection()
+    begin_immediate(conn)
+    try:
+        for statement in SCHEMA:
+            conn.execute(statement)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    migrate(conn)
+    conn.execute("PRAGMA optimize")
@@ -0,0 +1,37 @@
+import pytest
+
+from scoring import PreFilter, PREFILTER_HIGH, PREFILTER_LLM, PREFILTER_SKIP, parse_rate
+
+@pytest.mark.parametrize('rate, expected', [
+    ('$30-$40/hr', (30.0, 40.0)),
+    ('$35.00-$45.00/hr', (35.0, 45.0)),
+    ('$25 per hour', (25.0, 25.0)),
+    ('$5,000 per month', (28.9, 28.9)),
+    ('$60k-80k/yr', (28.85, 38.46)),
+    ('$60-80k', (28.85, 38.46)),
+    ('$60k-$80k', (28.85, 38.46)),
+    ('$60k', (28.85, 28.85)),
+    ('$40 Keyholder', (None, None)),
+    ('$30', (None, None)),
+    ('$300', (None, None)),
+    ('$1,000', (None, None)),
+    ('$2,500', (None, None)),
+    ('$50-$100 fixed', (None, None)),
+    ('See job posting', (None, None)),
+    ('', (None, None)),
+])
+def test_parse_rate(rate, expected):
+    assert parse_rate(rate) == expected
+
+@pytest.mark.parametrize('rate, decision', [
+    ('$30-$40/hr', PREFILTER_HIGH),
+    ('$10/hr', PREFILTER_SKIP),
+    ('$500', PREFILTER_LLM),
+    ('$50-$100 fixed', PREFILTER_LLM),
+    ('$2,500', PREFILTER_LLM),
+    ('$60-80k', PREFILTER_LLM),
+])
+def test_prefilter_only_trusts_stated_rates(rate, decision):
+    prefilter = PreFilter(whitelist=['discord'])
+    job = {'title': 'Discord Moderator', 'rate': rate, 'client_verified': True}
+    assert prefilter.classify(job)[0] == decision